@@ -4,3 +4,35 @@ from django.apps import AppConfig
 class FrontendConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'frontend'
+
+    def ready(self):
+        from django.contrib.auth.models import \
+            update_last_login as django_update_last_login
+        from django.contrib.auth.signals import user_logged_in
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_delete, post_save
+
+        from frontend import checks  # noqa: F401
+        from frontend.backends import update_last_login
+        from frontend.db import configure_sqlite
+        from frontend.user_cache import invalidate_user_on_change
+
+        # Swap Django's save()-based last_login handler for a targeted UPDATE
+        user_logged_in.disconnect(
+            django_update_last_login, dispatch_uid="update_last_login"
+        )
+        user_logged_in.connect(update_last_login, dispatch_uid="update_last_login")
+
+        connection_created.connect(configure_sqlite, dispatch_uid="configure_sqlite")
+
+        user_model = self.get_model("User")
+        post_save.connect(
+            invalidate_user_on_change,
+            sender=user_model,
+            dispatch_uid="invalidate_user_cache_on_save",
+        )
+        post_delete.connect(
+            invalidate_user_on_change,
+            sender=user_model,
+            dispatch_uid="invalidate_user_cache_on_delete",
+        )
@@ -0,0 +1,39 @@
+from django.urls import include, path
+
+from frontend import views
+
+# The project urlconf only routes auth/. The tests and benchmark_auth serve
+# this module as ROOT_URLCONF instead, with every view under the names the
+# views and email helpers reverse.
+frontend_patterns = [
+    path("auth/", views.auth_view, name="auth"),
+    path("verify/<str:token>/", views.verify_email_view, name="verify_email"),
+    path(
+        "verification-sent/",
+        views.verification_sent_view,
+        name="verification_sent",
+    ),
+    path(
+        "resend-verification/",
+        views.resend_verification_view,
+        name="resend_verification",
+    ),
+    path("password-reset/", views.password_reset_request_view, name="password_reset"),
+    path(
+        "password-reset/sent/",
+        views.password_reset_sent_view,
+        name="password_reset_sent",
+    ),
+    path(
+        "password-reset/<str:token>/",
+        views.password_reset_confirm_view,
+        name="password_reset_confirm",
+    ),
+]
+
+urlpatterns = [
+    path("", include((frontend_patterns, "frontend"))),
+    path("accounts/", include((frontend_patterns, "accounts"))),
+    path("", views.dashboard_view, name="home"),
+    path("profile/", views.profile_view, name="profile"),
+]
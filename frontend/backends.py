@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.utils import timezone
+
+from frontend.hashing import amake_password, averify_password
+
+User = get_user_model()
+
+
+class EmailBackend(ModelBackend):
+    """
+    ModelBackend that can also authenticate a user instance the caller has
+    already loaded, e.g. authenticate(request, user=user, password=password),
+    so the login path doesn't fetch the same row twice.
+    """
+
+    def authenticate(self, request, username=None, password=None, user=None, **kwargs):
+        if user is None:
+            return super().authenticate(request, username, password, **kwargs)
+        if password is None:
+            return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
+
+    async def aauthenticate(
+        self, request, username=None, password=None, user=None, **kwargs
+    ):
+        if user is None:
+            return await super().aauthenticate(request, username, password, **kwargs)
+        if password is None:
+            return None
+
+        is_correct, must_update = await averify_password(password, user.password)
+        if is_correct and must_update:
+            user.password = await amake_password(password)
+            await user.asave(update_fields=["password"])
+        if is_correct and self.user_can_authenticate(user):
+            return user
+        return None
+
+
+def update_last_login(sender, user, **kwargs):
+    """
+    Replacement for django.contrib.auth.models.update_last_login that issues a
+    single UPDATE instead of going through save() and its signals.
+    """
+    user.last_login = timezone.now()
+    User.objects.filter(pk=user.pk).update(last_login=user.last_login)
@@ -0,0 +1,14 @@
+"""
+frontend.sessions with a cache in front of the database for logged-in
+sessions. Only use it with SESSION_CACHE_ALIAS pointing at a cache every worker
+shares (Redis/Memcached): a per-process cache keeps serving a session other
+workers have logged out.
+"""
+
+from django.contrib.sessions.backends.cached_db import SessionStore as CachedDBStore
+
+from frontend.sessions import HybridSessionMixin
+
+
+class SessionStore(HybridSessionMixin, CachedDBStore):
+    cache_key_prefix = "frontend.sessions"
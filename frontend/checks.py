@@ -0,0 +1,86 @@
+import re
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.core.checks import Error, Tags, Warning, register
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+from frontend.images import get_variants
+
+# Literal paths passed to {% static %}, {% picture %} or {% inline_static %}
+STATIC_REFERENCE = re.compile(
+    r"{%\s*(static|picture|inline_static)\s+['\"]([^'\"]+)['\"]"
+)
+COMMENT = re.compile(r"{%\s*comment\s*%}.*?{%\s*endcomment\s*%}|{#.*?#}", re.S)
+
+
+def _template_dirs():
+    dirs = [Path(apps.get_app_config("frontend").path) / "templates"]
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            dirs.extend(Path(directory) for directory in engine.dirs)
+    return {directory.resolve() for directory in dirs if directory.is_dir()}
+
+
+def _template_references():
+    """Yield (template path, tag, static name) for each literal reference"""
+    for directory in _template_dirs():
+        for path in sorted(directory.rglob("*.html")):
+            source = COMMENT.sub("", path.read_text())
+            for tag, name in STATIC_REFERENCE.findall(source):
+                yield path, tag, name
+
+
+def pictured_images():
+    """Static names of the images the templates render with {% picture %}"""
+    return {name for _, tag, name in _template_references() if tag == "picture"}
+
+
+def _static_references():
+    for path, tag, name in _template_references():
+        yield path, name
+        if tag == "picture":
+            for variant in (get_variants(name) or {}).get("variants", []):
+                yield path, variant["path"]
+
+
+@register(Tags.staticfiles)
+def check_static_references(app_configs, **kwargs):
+    """
+    Every {% static %} path in the templates must exist, and with manifest
+    storage must have a hashed name, or rendering the page fails.
+    """
+    hashed = isinstance(staticfiles_storage, ManifestFilesMixin)
+    if hashed and not staticfiles_storage.hashed_files:
+        return [
+            Warning(
+                "The staticfiles manifest is missing or empty, so static "
+                "references can't be checked against hashed names.",
+                hint="Run `manage.py collectstatic`.",
+                id="frontend.W001",
+            )
+        ]
+
+    errors = []
+    for template, name in _static_references():
+        if hashed:
+            try:
+                staticfiles_storage.stored_name(name)
+                continue
+            except ValueError:
+                problem = "has no hashed name in the staticfiles manifest"
+        elif finders.find(name):
+            continue
+        else:
+            problem = "does not exist"
+        errors.append(
+            Error(
+                f"{template.name} references static file {name!r}, which {problem}.",
+                obj=str(template),
+                id="frontend.E001",
+            )
+        )
+    return errors
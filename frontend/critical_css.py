@@ -0,0 +1,185 @@
+"""
+Split a stylesheet into the rules a rendered page needs for first paint and
+the rest, for `manage.py build_auth_css`.
+
+Matching is structural, not layout-based: a rule is critical when every
+class, id and tag in one of its selectors occurs in the page. Interaction
+states (:hover, :focus, ...) are never critical, and @keyframes go with the
+rules that use them.
+"""
+
+import re
+from html.parser import HTMLParser
+
+COMMENT = re.compile(r"/\*.*?\*/", re.S)
+INTERACTIVE = re.compile(
+    r":(hover|focus|focus-visible|focus-within|active|visited|checked)\b"
+)
+PSEUDO = re.compile(r"::?[\w-]+(\([^)]*\))?")
+ATTRIBUTE = re.compile(r"\[[^\]]*\]")
+COMBINATOR = re.compile(r"\s*[>+~]\s*|\s+")
+# Elements without an end tag
+VOID_TAGS = set(
+    "area base br col embed hr img input link meta source track wbr".split()
+)
+ANIMATION = re.compile(r"animation(?:-name)?\s*:\s*([^;}]+)")
+
+
+class Block:
+    """
+    A rule (`prelude` { body }), a grouping at-rule such as @media (`children`
+    instead of a body) or a statement such as @import (neither)
+    """
+
+    def __init__(self, prelude, body=None, children=None):
+        self.prelude = prelude
+        self.body = body
+        self.children = children
+
+    def render(self):
+        if self.children is not None:
+            return f"{self.prelude}{{{render(self.children)}}}"
+        if self.body is None:
+            return f"{self.prelude};"
+        return f"{self.prelude}{{{self.body}}}"
+
+
+def _minify_prelude(text):
+    text = re.sub(r"\s+", " ", text).strip()
+    # Not ":", which would turn "a :hover" into "a:hover"
+    return re.sub(r"\s*([,>])\s*", r"\1", text)
+
+
+def _minify_body(text):
+    text = re.sub(r"\s+", " ", text).strip()
+    # Braces only occur here in @keyframes bodies
+    return re.sub(r"\s*([:;,{}])\s*", r"\1", text).rstrip(";")
+
+
+def parse(css):
+    """Parse `css` into a list of Blocks, recursing into grouping at-rules"""
+    css = COMMENT.sub("", css)
+    blocks = []
+    pos = 0
+    while True:
+        start = css.find("{", pos)
+        if start < 0:
+            break
+        prelude = css[pos:start].strip()
+        # Statements such as @import or @charset end with ";" before any "{"
+        while prelude.startswith("@") and ";" in prelude:
+            statement, prelude = prelude.split(";", 1)
+            blocks.append(Block(_minify_prelude(statement)))
+            prelude = prelude.strip()
+
+        depth, end = 1, start + 1
+        while depth:
+            depth += {"{": 1, "}": -1}.get(css[end], 0)
+            end += 1
+        body = css[start + 1 : end - 1]
+
+        if prelude.startswith(("@media", "@supports", "@container")):
+            blocks.append(Block(_minify_prelude(prelude), children=parse(body)))
+        else:
+            blocks.append(Block(_minify_prelude(prelude), _minify_body(body)))
+        pos = end
+    return blocks
+
+
+class _PageIndex(HTMLParser):
+    def __init__(self, hidden_class=None):
+        super().__init__()
+        self.tags, self.classes, self.ids = {"html", "body"}, set(), set()
+        self.hidden_class = hidden_class
+        self._hidden_depth = 0  # open elements inside a hidden one
+
+    def handle_starttag(self, tag, attrs):
+        self._start(tag, attrs, void=tag in VOID_TAGS)
+
+    def handle_startendtag(self, tag, attrs):
+        self._start(tag, attrs, void=True)
+
+    def handle_endtag(self, tag):
+        if self._hidden_depth and tag not in VOID_TAGS:
+            self._hidden_depth -= 1
+
+    def _start(self, tag, attrs, void):
+        if self._hidden_depth:
+            self._hidden_depth += not void
+            return
+        self.tags.add(tag)
+        classes = []
+        for name, value in attrs:
+            if name == "class" and value:
+                classes = value.split()
+                self.classes.update(classes)
+            elif name == "id" and value:
+                self.ids.add(value)
+        # The hidden element itself is indexed: its display:none rule is needed
+        if self.hidden_class in classes and not void:
+            self._hidden_depth = 1
+
+
+def index_page(*html_pages, hidden_class=None):
+    """
+    Index the tags, classes and ids of `html_pages`. Descendants of elements
+    with `hidden_class` (a display:none utility) don't paint, so they're skipped.
+    """
+    index = _PageIndex(hidden_class)
+    for html in html_pages:
+        index.feed(html)
+    return index
+
+
+def _selector_matches(selector, page):
+    if INTERACTIVE.search(selector):
+        return False
+    selector = ATTRIBUTE.sub("", PSEUDO.sub("", selector))
+    for compound in COMBINATOR.split(selector.strip()):
+        if not compound or compound == "*":
+            continue
+        tag = re.match(r"[a-zA-Z][\w-]*", compound)
+        if tag and tag.group().lower() not in page.tags:
+            return False
+        classes = re.findall(r"\.([\w-]+)", compound)
+        ids = re.findall(r"#([\w-]+)", compound)
+        if not page.classes.issuperset(classes) or not page.ids.issuperset(ids):
+            return False
+    return True
+
+
+def _is_critical(block, page):
+    if block.prelude.startswith(("@font-face", "@import", "@charset")):
+        return True
+    return any(_selector_matches(s, page) for s in block.prelude.split(","))
+
+
+def split(blocks, page):
+    """Return (critical, deferred) Block lists for the indexed `page`"""
+    critical, deferred = [], []
+    keyframes = []
+    for block in blocks:
+        if block.prelude.startswith("@keyframes"):
+            keyframes.append(block)
+        elif block.children is not None:
+            inner_critical, inner_deferred = split(block.children, page)
+            if inner_critical:
+                critical.append(Block(block.prelude, children=inner_critical))
+            if inner_deferred:
+                deferred.append(Block(block.prelude, children=inner_deferred))
+        elif _is_critical(block, page):
+            critical.append(block)
+        else:
+            deferred.append(block)
+
+    used = set()
+    for match in ANIMATION.findall(render(critical)):
+        used.update(match.replace(",", " ").split())
+    for block in keyframes:
+        name = block.prelude.split(None, 1)[1]
+        (critical if name in used else deferred).append(block)
+    return critical, deferred
+
+
+def render(blocks):
+    return "".join(block.render() for block in blocks)
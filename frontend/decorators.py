@@ -0,0 +1,129 @@
+import re
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.middleware.csrf import get_token
+
+from frontend import ratelimit
+
+# Output of {% csrf_token %}; the per-visitor token is swapped in on every hit
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="[^"]*"')
+CSRF_PLACEHOLDER = b'name="csrfmiddlewaretoken" value="__csrf_token__"'
+
+
+def _cache():
+    return caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")]
+
+
+def _cache_key(request):
+    return f"frontend:page:{request.path}"
+
+
+def _cacheable(request):
+    # Pending flash messages (FallbackStorage always leaves a messages cookie)
+    # must be rendered and consumed, so those requests skip the cache
+    return (
+        request.method in ("GET", "HEAD")
+        and not request.GET
+        and CookieStorage.cookie_name not in request.COOKIES
+    )
+
+
+def _page_from_cache(request, content):
+    token = get_token(request).encode()
+    return HttpResponse(
+        content.replace(
+            CSRF_PLACEHOLDER, b'name="csrfmiddlewaretoken" value="' + token + b'"'
+        )
+    )
+
+
+def _page_to_cache(response):
+    if response.status_code != 200 or response.streaming:
+        return None
+    return CSRF_INPUT.sub(CSRF_PLACEHOLDER, response.content)
+
+
+def cache_anonymous_page(view_func):
+    """
+    Serve GET requests from anonymous visitors from a shared page cache.
+
+    Pages are cached per path for PAGE_CACHE_TIMEOUT seconds with the CSRF
+    token blanked out, and each hit gets the visitor's own token.
+    """
+    timeout = getattr(settings, "PAGE_CACHE_TIMEOUT", 300)
+
+    if iscoroutinefunction(view_func):
+
+        async def _view_wrapper(request, *args, **kwargs):
+            if not _cacheable(request) or (await request.auser()).is_authenticated:
+                return await view_func(request, *args, **kwargs)
+
+            key = _cache_key(request)
+            content = await _cache().aget(key)
+            if content is not None:
+                return _page_from_cache(request, content)
+
+            response = await view_func(request, *args, **kwargs)
+            content = _page_to_cache(response)
+            if content is not None:
+                await _cache().aset(key, content, timeout)
+            return response
+
+    else:
+
+        def _view_wrapper(request, *args, **kwargs):
+            if not _cacheable(request) or request.user.is_authenticated:
+                return view_func(request, *args, **kwargs)
+
+            key = _cache_key(request)
+            content = _cache().get(key)
+            if content is not None:
+                return _page_from_cache(request, content)
+
+            response = view_func(request, *args, **kwargs)
+            content = _page_to_cache(response)
+            if content is not None:
+                _cache().set(key, content, timeout)
+            return response
+
+    return wraps(view_func)(_view_wrapper)
+
+
+def rate_limit(scope):
+    """
+    Answer POSTs over the RATE_LIMITS for scope with a 429 before the view
+    runs, so rejected requests never reach password hashing or email sending.
+
+    scope is a key of RATE_LIMITS, or a function of the request returning one.
+    """
+
+    def decorator(view_func):
+        def _scope(request):
+            return scope(request) if callable(scope) else scope
+
+        if iscoroutinefunction(view_func):
+
+            async def _view_wrapper(request, *args, **kwargs):
+                if request.method == "POST":
+                    retry_after = await ratelimit.acheck(request, _scope(request))
+                    if retry_after:
+                        return ratelimit.too_many_requests(retry_after)
+                return await view_func(request, *args, **kwargs)
+
+        else:
+
+            def _view_wrapper(request, *args, **kwargs):
+                if request.method == "POST":
+                    retry_after = ratelimit.check(request, _scope(request))
+                    if retry_after:
+                        return ratelimit.too_many_requests(retry_after)
+                return view_func(request, *args, **kwargs)
+
+        return wraps(view_func)(_view_wrapper)
+
+    return decorator
@@ -2,6 +2,8 @@ from django import forms
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
 
+from frontend.user_cache import lookup_user_by_email
+
 User = get_user_model()
 
 
@@ -39,6 +41,8 @@ class SignUpForm(UserCreationForm):
             }
         ),
         label="Email Address",
+        # The model's max_length check is skipped with the other email checks
+        max_length=254,
     )
 
     full_name = forms.CharField(
@@ -88,6 +92,15 @@ class SignUpForm(UserCreationForm):
         model = User
         fields = ("email", "password1", "password2")
 
+    def _get_validation_exclusions(self):
+        # Email uniqueness is decided by handle_signup in the same transaction
+        # as the INSERT (and backed by DB constraints), which also lets a stale
+        # unverified account be replaced, so skip the model-level unique and
+        # constraint queries here
+        exclude = super()._get_validation_exclusions()
+        exclude.add("email")
+        return exclude
+
     def save(self, commit=True):
         user = super().save(commit=False)
         user.email = self.cleaned_data["email"]
@@ -143,12 +156,21 @@ class PasswordResetRequestForm(forms.Form):
         help_text="Enter your email address.",
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_cache = None
+
     def clean_email(self):
         email = self.cleaned_data.get("email")
-        if not User.objects.filter(email=email).exists():
+        self.user_cache = lookup_user_by_email(email)
+        if self.user_cache is None:
             raise forms.ValidationError("No account found with this email.")
         return email
 
+    def get_user(self):
+        """The user loaded during validation, for request_password_reset"""
+        return self.user_cache
+
 
 class PasswordResetConfirmForm(forms.Form):
     """Form for confirming password reset with new password"""
@@ -205,12 +227,19 @@ class ResendVerificationForm(forms.Form):
         help_text="Enter your email address to resend verification link.",
     )
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.user_cache = None
+
     def clean_email(self):
         email = self.cleaned_data.get("email")
-        try:
-            user = User.objects.get(email=email)
-            if user.is_verified_email:  # type: ignore
-                raise forms.ValidationError("This email address is already verified.")
-        except User.DoesNotExist:
+        self.user_cache = lookup_user_by_email(email)
+        if self.user_cache is None:
             raise forms.ValidationError("No account found with this email address.")
+        if self.user_cache.is_verified_email:  # type: ignore
+            raise forms.ValidationError("This email address is already verified.")
         return email
+
+    def get_user(self):
+        """The user loaded during validation, for resend_verification"""
+        return self.user_cache
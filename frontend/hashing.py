@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from frontend.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+
+class HashingPoolBusy(Exception):
+    """Raised when the hashing pool already has its maximum pending jobs"""
+
+
+class HashingPool:
+    """
+    Runs password hashing and verification on a process pool.
+
+    PBKDF2 holds the GIL for the whole computation, so running it on the
+    request thread stalls every other request in the worker. Jobs are sent to
+    `workers` processes instead; at most `max_pending` may be queued or running
+    at once, and further submissions fail fast with HashingPoolBusy so the
+    caller can answer 503 rather than pile up requests.
+
+    Workers are started by a forkserver rather than forked from the server
+    process, which by then may hold DB connections, locks held by other
+    threads and a running event loop that a fork would copy in a broken state.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = None
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def submit(self, func, *args):
+        """Queue func(*args) and return its Future, or raise HashingPoolBusy"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            logger.warning("Password hashing pool saturated, rejecting request")
+            raise HashingPoolBusy()
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("forkserver"),
+                )
+            self._pending += 1
+
+        started = time.perf_counter()
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._finish(started)
+            raise
+        future.add_done_callback(lambda _: self._finish(started))
+        return future
+
+    def stats(self):
+        """Queue depth and latency metrics since the pool was created"""
+        with self._lock:
+            completed = self._completed
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_latency_ms": (
+                    self._total_latency / completed * 1000 if completed else 0.0
+                ),
+                "max_latency_ms": self._max_latency * 1000,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _finish(self, started):
+        latency = time.perf_counter() - started
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+        self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """
+    Return the process-wide hashing pool, or None when
+    PASSWORD_HASHING_WORKERS is 0 and hashing runs inline.
+    """
+    global _pool
+    workers = getattr(settings, "PASSWORD_HASHING_WORKERS", 0)
+    if not workers:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = HashingPool(
+                    workers=workers,
+                    max_pending=getattr(settings, "PASSWORD_HASHING_MAX_PENDING", 32),
+                )
+    return _pool
+
+
+def _run(func, *args):
+    pool = get_hashing_pool()
+    with timed("hash"):
+        if pool is None:
+            return func(*args)
+        return pool.submit(func, *args).result()
+
+
+async def _arun(func, *args):
+    pool = get_hashing_pool()
+    with timed("hash"):
+        if pool is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, func, *args)
+        return await asyncio.wrap_future(pool.submit(func, *args))
+
+
+def make_password(password):
+    """Pool-backed version of django.contrib.auth.hashers.make_password"""
+    if password is None:
+        # Unusable passwords don't involve hashing
+        return hashers.make_password(None)
+    return _run(hashers.make_password, password)
+
+
+def check_password(password, encoded, setter=None):
+    """Pool-backed version of django.contrib.auth.hashers.check_password"""
+    is_correct, must_update = _run(hashers.verify_password, password, encoded)
+    if setter and is_correct and must_update:
+        setter(password)
+    return is_correct
+
+
+async def amake_password(password):
+    if password is None:
+        return hashers.make_password(None)
+    return await _arun(hashers.make_password, password)
+
+
+async def averify_password(password, encoded):
+    """Return (is_correct, must_update) without blocking the event loop"""
+    return await _arun(hashers.verify_password, password, encoded)
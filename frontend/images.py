@@ -0,0 +1,133 @@
+"""
+Resized and recompressed variants of the static images.
+
+`manage.py optimize_images` writes the variants under
+frontend/static/frontend/images/variants/ together with a manifest that the
+{% picture %} template tag reads to build srcset markup.
+"""
+
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from PIL import Image
+
+VARIANTS_DIR = "frontend/images/variants"
+MANIFEST_NAME = f"{VARIANTS_DIR}/manifest.json"
+
+EXTENSIONS = {"webp": "webp", "png": "png", "jpeg": "jpg"}
+
+
+def variant_widths(original_width):
+    # Never upscale; images narrower than the largest width keep their own
+    widths = getattr(settings, "IMAGE_VARIANT_WIDTHS", [240, 480, 720, 1080])
+    smaller = [width for width in widths if width < original_width]
+    if original_width <= max(widths):
+        smaller.append(original_width)
+    return smaller
+
+
+def _has_alpha(image):
+    if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info:
+        alpha = image.convert("RGBA").getchannel("A")
+        return alpha.getextrema()[0] < 255
+    return False
+
+
+def _save(image, path, fmt, quality):
+    if fmt == "webp":
+        image.save(path, "WEBP", quality=quality, method=6)
+    elif fmt == "jpeg":
+        image.convert("RGB").save(
+            path, "JPEG", quality=quality, optimize=True, progressive=True
+        )
+    else:
+        # 256-colour palette with alpha, as pngquant would do
+        image.quantize(256, method=Image.Quantize.FASTOCTREE).save(
+            path, "PNG", optimize=True
+        )
+
+
+def build_variants(name, source, out_dir, quality=80):
+    """
+    Write the variants of the static file `name` (read from `source`) to
+    `out_dir` and return its manifest entry.
+    """
+    with Image.open(source) as image:
+        image.load()
+        # Opaque images fall back to JPEG, transparent ones to PNG
+        fallback = "png" if _has_alpha(image) else "jpeg"
+        if fallback == "jpeg":
+            image = image.convert("RGB")
+        elif image.mode != "RGBA":
+            image = image.convert("RGBA")
+
+        width, height = image.size
+        stem = Path(name).stem
+        variants = []
+        for variant_width in variant_widths(width):
+            variant_height = round(height * variant_width / width)
+            resized = (
+                image
+                if variant_width == width
+                else image.resize((variant_width, variant_height), Image.LANCZOS)
+            )
+            for fmt in (fallback, "webp"):
+                filename = f"{stem}-{variant_width}.{EXTENSIONS[fmt]}"
+                _save(resized, out_dir / filename, fmt, quality)
+                variants.append(
+                    {
+                        "path": f"{VARIANTS_DIR}/{filename}",
+                        "format": fmt,
+                        "width": variant_width,
+                        "bytes": (out_dir / filename).stat().st_size,
+                    }
+                )
+
+    # Flat artwork can compress better as a palette PNG than as WebP; then the
+    # WebP source would only make browsers download more
+    sizes = {fmt: 0 for fmt in (fallback, "webp")}
+    for variant in variants:
+        sizes[variant["format"]] += variant["bytes"]
+    if sizes["webp"] >= sizes[fallback]:
+        for variant in variants:
+            if variant["format"] == "webp":
+                (out_dir / Path(variant["path"]).name).unlink()
+        variants = [variant for variant in variants if variant["format"] != "webp"]
+
+    return {
+        "width": width,
+        "height": height,
+        "fallback": fallback,
+        "variants": variants,
+    }
+
+
+def read_manifest(out_dir):
+    path = out_dir / Path(MANIFEST_NAME).name
+    if not path.exists():
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def write_manifest(out_dir, entries):
+    with open(out_dir / Path(MANIFEST_NAME).name, "w") as fh:
+        json.dump(entries, fh, indent=2, sort_keys=True)
+    load_manifest.cache_clear()
+
+
+@lru_cache
+def load_manifest():
+    path = finders.find(MANIFEST_NAME)
+    if not path:
+        return {}
+    with open(path) as fh:
+        return json.load(fh)
+
+
+def get_variants(name):
+    """Manifest entry for the static file `name`, or None if it has none"""
+    return load_manifest().get(name)
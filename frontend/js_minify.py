@@ -0,0 +1,81 @@
+"""
+Conservative JavaScript minifier for `manage.py build_auth_js`.
+
+Removes comments, indentation, blank lines and insignificant spaces, but keeps
+line breaks, so automatic semicolon insertion behaves exactly as in the
+source. String, template and regex literals are copied untouched.
+"""
+
+import re
+
+# After these characters (or at the start) a "/" starts a regex, not a division
+REGEX_PRECEDERS = set("(,=:[!&|?{};+-*%<>~^") | {""}
+
+# Spaces next to these are never significant. "+", "-" and "/" are left out:
+# "a - -b" and "a / /re/" need theirs.
+PUNCTUATION = re.compile(r" ?([{}()\[\];,=:<>&|?!*]) ?")
+
+
+def _literal_end(source, pos):
+    quote = source[pos]
+    pos += 1
+    while source[pos] != quote:
+        pos += 2 if source[pos] == "\\" else 1
+    return pos + 1
+
+
+def _regex_end(source, pos):
+    pos += 1
+    in_class = False
+    while in_class or source[pos] != "/":
+        if source[pos] == "\\":
+            pos += 1
+        elif source[pos] == "[":
+            in_class = True
+        elif source[pos] == "]":
+            in_class = False
+        pos += 1
+    pos += 1
+    while pos < len(source) and source[pos].isalpha():  # flags
+        pos += 1
+    return pos
+
+
+def _tokens(source):
+    """Yield (is_literal, text) chunks with comments removed"""
+    code = []
+    pos = 0
+    last = ""  # last significant character of code
+    while pos < len(source):
+        char = source[pos]
+        if source.startswith("//", pos):
+            end = source.find("\n", pos)
+            pos = len(source) if end < 0 else end
+        elif source.startswith("/*", pos):
+            pos = source.index("*/", pos) + 2
+            code.append(" ")
+        elif char in "'\"`" or (char == "/" and last in REGEX_PRECEDERS):
+            end = _literal_end(source, pos) if char != "/" else _regex_end(source, pos)
+            yield False, "".join(code)
+            yield True, source[pos:end]
+            code = []
+            pos, last = end, char
+        else:
+            code.append(char)
+            if not char.isspace():
+                last = char
+            pos += 1
+    yield False, "".join(code)
+
+
+def _compact(code):
+    code = re.sub(r"[ \t]+", " ", code)
+    code = re.sub(r" ?\n[\s]*", "\n", code)
+    return PUNCTUATION.sub(r"\1", code)
+
+
+def minify(source):
+    out = "".join(
+        text if is_literal else _compact(text) for is_literal, text in _tokens(source)
+    )
+    return out.strip() + "\n"
@@ -0,0 +1,101 @@
+import re
+import threading
+from types import SimpleNamespace
+
+from django.contrib.sites.shortcuts import get_current_site
+from django.template import TemplateDoesNotExist
+from django.template.loader import get_template
+from django.utils.html import escape, strip_tags
+
+# Per-user values are rendered as \x1f<field>\x1f markers and filled in later
+_MARKER = "\x1f{}\x1f"
+_MARKER_RE = re.compile("\x1f([^\x1f]+)\x1f")
+
+USER_FIELDS = ("name", "email")
+
+
+class EmailRenderer:
+    """
+    Renders transactional emails from pre-rendered, per-site skeletons.
+
+    Each template pair (`<name>.html` and `<name>.txt`) is compiled once and
+    rendered once per site with markers in place of the per-user fields and
+    links. Sending an email then only substitutes those markers. Templates must
+    output per-user fields directly (no filters), since filters would be
+    applied to the marker rather than the real value.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._skeletons = {}
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def site(self, request):
+        """Resolve the current site once per host"""
+        host = request.get_host()
+        site = self._sites.get(host)
+        if site is None:
+            current = get_current_site(request)
+            site = SimpleNamespace(name=current.name, domain=current.domain)
+            self._sites[host] = site
+        return site
+
+    def render(self, name, request, user, **links):
+        """Return (site, plain_message, html_message) for `user`"""
+        site = self.site(request)
+        html, text = self._skeleton(name, site, tuple(sorted(links)))
+
+        values = {f"user.{field}": str(getattr(user, field)) for field in USER_FIELDS}
+        values.update(links)
+        plain_message = _MARKER_RE.sub(lambda m: values[m.group(1)], text)
+        html_message = _MARKER_RE.sub(lambda m: escape(values[m.group(1)]), html)
+        return site, plain_message, html_message
+
+    def clear(self):
+        with self._lock:
+            self._templates.clear()
+            self._skeletons.clear()
+            self._sites.clear()
+
+    def _template(self, template_name):
+        template = self._templates.get(template_name)
+        if template is None:
+            template = get_template(template_name)
+            with self._lock:
+                self._templates[template_name] = template
+        return template
+
+    def _skeleton(self, name, site, link_names):
+        key = (name, site.domain, site.name, link_names)
+        skeleton = self._skeletons.get(key)
+        if skeleton is not None:
+            return skeleton
+
+        placeholder_user = SimpleNamespace(
+            **{field: _MARKER.format(f"user.{field}") for field in USER_FIELDS}
+        )
+        context = {
+            "user": placeholder_user,
+            "site_name": site.name,
+            "domain": site.domain,
+            **{link: _MARKER.format(link) for link in link_names},
+        }
+        html = self._template(f"{name}.html").render(context)
+        try:
+            text = self._template(f"{name}.txt").render(context)
+        except TemplateDoesNotExist:
+            # No text template: strip the skeleton once rather than per message
+            text = strip_tags(html)
+
+        with self._lock:
+            self._skeletons[key] = (html, text)
+        return html, text
+
+
+renderer = EmailRenderer()
+
+
+def render_email(name, request, user, **links):
+    """Render the `name` email for `user` with the shared renderer"""
+    return renderer.render(name, request, user, **links)
@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.mail import get_connection
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    Pool of long-lived email backend connections.
+
+    Opening an SMTP connection costs a TCP + TLS + AUTH round-trip, so idle
+    connections are kept open and handed out again. A connection that has been
+    idle longer than `idle_timeout` or fails a NOOP health check is closed and
+    replaced instead of being reused.
+    """
+
+    def __init__(self, size=4, idle_timeout=60, backend=None, **backend_kwargs):
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.backend = backend
+        self.backend_kwargs = backend_kwargs
+        self._idle = []  # (connection, last_used) pairs, most recent last
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def acquire(self):
+        """Check out an open connection, blocking while all are in use"""
+        self._slots.acquire()
+        try:
+            return self._checkout()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection):
+        """Return a connection obtained from acquire()"""
+        with self._lock:
+            self._idle.append((connection, time.monotonic()))
+        self._slots.release()
+
+    def discard(self, connection):
+        """Close a connection obtained from acquire() instead of returning it"""
+        _close_quietly(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        connection = self.acquire()
+        try:
+            yield connection
+        except Exception:
+            # The session may be mid-transaction; don't hand it out again
+            self.discard(connection)
+            raise
+        self.release(connection)
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            _close_quietly(connection)
+
+    def _checkout(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                connection, last_used = self._idle.pop()
+
+            if time.monotonic() - last_used > self.idle_timeout:
+                _close_quietly(connection)
+            elif not _is_healthy(connection):
+                _close_quietly(connection)
+            else:
+                return connection
+
+        connection = get_connection(
+            self.backend, fail_silently=False, **self.backend_kwargs
+        )
+        connection.open()
+        return connection
+
+
+def _is_healthy(connection):
+    # Only the SMTP backend holds a socket; other backends are always usable
+    smtp = getattr(connection, "connection", None)
+    if smtp is None:
+        return True
+    try:
+        status, _ = smtp.noop()
+    except Exception:
+        return False
+    return status == 250
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception as e:
+        logger.warning(f"Error closing mail connection: {str(e)}")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_connection_pool():
+    """Return the process-wide connection pool configured in settings"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    size=getattr(settings, "EMAIL_POOL_SIZE", 4),
+                    idle_timeout=getattr(settings, "EMAIL_POOL_IDLE_TIMEOUT", 60),
+                )
+    return _pool
+
+
+def send_mass(messages, pool=None):
+    """Send a list of EmailMessage objects over a single pooled connection"""
+    pool = pool or get_connection_pool()
+    with pool.connection() as connection:
+        return connection.send_messages(messages)
@@ -0,0 +1,330 @@
+import json
+import platform
+import statistics
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core import mail
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test import Client, RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from frontend.forms import LoginForm, PasswordResetRequestForm, SignUpForm
+from frontend.models import EmailVerificationToken, PasswordResetToken, User
+from frontend.services import (confirm_password_reset, handle_login,
+                               handle_signup, request_password_reset,
+                               verify_email_token)
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "benchmarks" / "auth.json"
+PASSWORD = "Bench-pass-123"
+
+BENCHMARK_SETTINGS = {
+    # The project urlconf lacks the routes email links and redirects use
+    "ROOT_URLCONF": "frontend.auth_urls",
+    "ALLOWED_HOSTS": ["testserver"],
+    # Send inline to memory so each email is rendered and "sent" in the request
+    "EMAIL_BACKEND": "django.core.mail.backends.locmem.EmailBackend",
+    "EMAIL_OUTBOX_ENABLED": False,
+    # Every sample is a distinct user; don't let limits or cooldowns skip work
+    "RATE_LIMITS": {},
+    "EMAIL_SEND_COOLDOWN": 0,
+}
+
+
+def _p95(timings):
+    if len(timings) < 2:
+        return timings[0]
+    return statistics.quantiles(timings, n=20, method="inclusive")[-1]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database and measure latency, throughput and "
+        "queries of the auth services and auth_view, optionally saving the "
+        "results as a baseline or comparing against one"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users", type=int, default=10_000, help="Existing users to seed."
+        )
+        parser.add_argument(
+            "--samples", type=int, default=30, help="Operations timed per scenario."
+        )
+        parser.add_argument(
+            "--fast-hashers",
+            action="store_true",
+            help="Hash with MD5 to measure everything except password hashing.",
+        )
+        parser.add_argument(
+            "--save-baseline",
+            nargs="?",
+            const=str(DEFAULT_BASELINE),
+            metavar="PATH",
+            help=f"Write the results as the baseline (default {DEFAULT_BASELINE}).",
+        )
+        parser.add_argument(
+            "--compare",
+            nargs="?",
+            const=str(DEFAULT_BASELINE),
+            metavar="PATH",
+            help="Compare the results with a saved baseline.",
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=20.0,
+            help="Percent slowdown of the median reported as a regression.",
+        )
+        parser.add_argument(
+            "--fail-on-regression",
+            action="store_true",
+            help="Exit with an error if --compare finds a regression.",
+        )
+
+    def handle(self, *args, **options):
+        overrides = dict(BENCHMARK_SETTINGS)
+        if options["fast_hashers"]:
+            overrides["PASSWORD_HASHERS"] = [
+                "django.contrib.auth.hashers.MD5PasswordHasher"
+            ]
+
+        # Runs against the test database (in-memory for SQLite), never db.sqlite3
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(**overrides):
+                for alias in settings.CACHES:
+                    caches[alias].clear()
+                self.seed(options["users"], options["samples"])
+                results = self.run_scenarios(options["samples"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        meta = {
+            "users": options["users"],
+            "samples": options["samples"],
+            "fast_hashers": options["fast_hashers"],
+            "python": platform.python_version(),
+            "django": django.get_version(),
+        }
+        baseline = None
+        if options["compare"]:
+            baseline = self.load_baseline(Path(options["compare"]), meta)
+        regressions = self.report(results, baseline, options["threshold"])
+
+        if options["save_baseline"]:
+            target = Path(options["save_baseline"])
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(
+                json.dumps({"meta": meta, "results": results}, indent=2) + "\n"
+            )
+            self.stdout.write(f"Saved baseline to {target}")
+
+        if regressions and options["fail_on_regression"]:
+            raise CommandError(f"Slower than the baseline: {', '.join(regressions)}")
+
+    def seed(self, user_count, samples):
+        start = time.perf_counter()
+        # One hash shared by every seeded user keeps seeding fast
+        password = make_password(PASSWORD)
+        User.objects.bulk_create(
+            (
+                User(
+                    email=f"user{i}@example.com",
+                    name=f"User {i}",
+                    password=password,
+                    is_active=True,
+                    is_verified_email=True,
+                )
+                for i in range(user_count)
+            ),
+            batch_size=5_000,
+        )
+        unverified = User.objects.bulk_create(
+            User(email=f"new{i}@example.com", name=f"New {i}", password=password)
+            for i in range(samples)
+        )
+        # bulk_create() skips save(), which sets expires_at
+        expires_at = timezone.now() + timedelta(hours=1)
+        EmailVerificationToken.objects.bulk_create(
+            EmailVerificationToken(user=user, expires_at=expires_at)
+            for user in unverified
+        )
+        # Other users than the ones logging in, as redeeming changes passwords
+        PasswordResetToken.objects.bulk_create(
+            PasswordResetToken(user=user, expires_at=expires_at)
+            for user in self.verified_users()[samples : samples * 2]
+        )
+        self.stdout.write(
+            f"Seeded {user_count + samples} users in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+
+    def verified_users(self):
+        return User.objects.filter(is_verified_email=True).order_by("pk")
+
+    def run_scenarios(self, samples):
+        factory = RequestFactory()
+        users = list(self.verified_users()[:samples])
+        verification_tokens = [
+            str(token)
+            for token in EmailVerificationToken.objects.values_list("token", flat=True)
+        ]
+        reset_tokens = [
+            str(token)
+            for token in PasswordResetToken.objects.values_list("token", flat=True)
+        ]
+
+        def signup_form(i, prefix="signup"):
+            form = SignUpForm(
+                {
+                    "email": f"{prefix}{i}@example.com",
+                    "full_name": f"Signup {i}",
+                    "password1": PASSWORD,
+                    "password2": PASSWORD,
+                    "agree_terms": "on",
+                }
+            )
+            assert form.is_valid(), form.errors
+            return form
+
+        def login_form(i):
+            form = LoginForm({"email": users[i].email, "password": PASSWORD})
+            assert form.is_valid(), form.errors
+            return form
+
+        def reset_form(i):
+            form = PasswordResetRequestForm({"email": users[i].email})
+            assert form.is_valid(), form.errors
+            return form
+
+        def get_auth_page(client):
+            return client.get("/auth/")
+
+        def cached_client(i):
+            client = Client()
+            if i == 0:
+                # Fill cache_anonymous_page's cache so every sample is a hit
+                get_auth_page(client)
+            return client
+
+        def uncached_client(i):
+            # Drop the cached page so every sample renders the template
+            caches[getattr(settings, "PAGE_CACHE_ALIAS", "default")].clear()
+            return Client()
+
+        # (name, prepare(i) run untimed, operation(prepared) timed)
+        scenarios = [
+            (
+                "handle_signup",
+                signup_form,
+                lambda form: handle_signup(factory.post("/auth/"), form),
+            ),
+            (
+                "handle_login",
+                login_form,
+                lambda form: handle_login(factory.post("/auth/"), form),
+            ),
+            (
+                "verify_email_token",
+                lambda i: verification_tokens[i],
+                verify_email_token,
+            ),
+            (
+                "request_password_reset",
+                reset_form,
+                lambda form: request_password_reset(
+                    factory.post("/password-reset/"), form
+                ),
+            ),
+            (
+                "confirm_password_reset",
+                lambda i: reset_tokens[i],
+                lambda token: confirm_password_reset(token, f"{PASSWORD}-new"),
+            ),
+            ("auth_view GET cached", cached_client, get_auth_page),
+            ("auth_view GET uncached", uncached_client, get_auth_page),
+            (
+                "auth_view POST login",
+                lambda i: (Client(), users[i].email),
+                lambda args: args[0].post(
+                    "/auth/",
+                    {"login_form": "1", "email": args[1], "password": PASSWORD},
+                ),
+            ),
+            (
+                "auth_view POST signup",
+                lambda i: (Client(), signup_form(i, prefix="client").data),
+                lambda args: args[0].post("/auth/", {"signup_form": "1", **args[1]}),
+            ),
+        ]
+
+        results = {}
+        for name, prepare, operation in scenarios:
+            results[name] = self.measure(samples, prepare, operation)
+            mail.outbox = []
+        return results
+
+    def measure(self, samples, prepare, operation):
+        timings = []
+        query_count = 0
+        for i in range(samples):
+            prepared = prepare(i)
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                operation(prepared)
+                timings.append((time.perf_counter() - start) * 1000)
+            query_count += len(queries)
+        return {
+            "median_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(_p95(timings), 3),
+            # Sequential, single connection: 1000 / mean latency
+            "ops_per_sec": round(1000 * len(timings) / sum(timings), 1),
+            "queries": round(query_count / samples, 2),
+        }
+
+    def load_baseline(self, path, meta):
+        if not path.exists():
+            raise CommandError(f"No baseline at {path}; create it with --save-baseline")
+        baseline = json.loads(path.read_text())
+        for key in ("users", "samples", "fast_hashers"):
+            if baseline["meta"].get(key) != meta[key]:
+                self.stderr.write(
+                    f"Baseline was taken with {key}={baseline['meta'].get(key)!r}, "
+                    f"this run uses {meta[key]!r}; numbers may not be comparable."
+                )
+        return baseline["results"]
+
+    def report(self, results, baseline, threshold):
+        header = (
+            f"{'scenario':<24} {'median':>9} {'p95':>9} {'ops/s':>8} {'queries':>8}"
+        )
+        if baseline:
+            header += f" {'baseline':>9} {'change':>8}"
+        self.stdout.write(header)
+
+        regressions = []
+        for name, result in results.items():
+            line = (
+                f"{name:<24} {result['median_ms']:7.2f}ms {result['p95_ms']:7.2f}ms "
+                f"{result['ops_per_sec']:8.1f} {result['queries']:8.2f}"
+            )
+            before = (baseline or {}).get(name)
+            if before:
+                change = (result["median_ms"] / before["median_ms"] - 1) * 100
+                line += f" {before['median_ms']:7.2f}ms {change:+7.1f}%"
+                if change > threshold:
+                    line += "  REGRESSION"
+                    regressions.append(name)
+                if result["queries"] != before["queries"]:
+                    line += f"  queries were {before['queries']:.2f}"
+            self.stdout.write(line)
+        return regressions
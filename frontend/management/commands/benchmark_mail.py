@@ -0,0 +1,113 @@
+import socketserver
+import threading
+import time
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+
+from frontend.mailer import ConnectionPool, send_mass
+
+SMTP_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept and discard messages"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        # Simulate the TCP + TLS + AUTH cost of opening a real session
+        time.sleep(self.server.handshake_delay)
+        self.reply("220 localhost stand-in SMTP")
+        in_data = False
+        for raw in self.rfile:
+            line = raw.decode(errors="replace").rstrip("\r\n")
+            if in_data:
+                if line == ".":
+                    in_data = False
+                    self.server.received += 1
+                    self.reply("250 OK")
+                continue
+
+            command = line[:4].upper()
+            if command == "EHLO":
+                self.reply("250 localhost")
+            elif command == "DATA":
+                in_data = True
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                # HELO, MAIL, RCPT, RSET, NOOP
+                self.reply("250 OK")
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, handshake_delay):
+        super().__init__(("127.0.0.1", 0), _SMTPHandler)
+        self.handshake_delay = handshake_delay
+        self.received = 0
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure messages/sec against a local stand-in SMTP server, comparing a "
+        "new connection per message with pooled batched delivery"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=200)
+        parser.add_argument(
+            "--handshake-ms",
+            type=float,
+            default=20,
+            help="Artificial delay per new SMTP session.",
+        )
+
+    def handle(self, *args, **options):
+        count = options["messages"]
+        server = _SMTPServer(options["handshake_ms"] / 1000)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        host, port = server.server_address
+        backend_kwargs = {"host": host, "port": port, "use_tls": False}
+
+        messages = [
+            EmailMessage(
+                subject="Verify your email",
+                body="Click the link to verify your email.",
+                from_email="noreply@localhost",
+                to=[f"user{i}@example.com"],
+            )
+            for i in range(count)
+        ]
+
+        try:
+            # Baseline: what send_mail() does, one session per message
+            start = time.perf_counter()
+            for message in messages:
+                connection = get_connection(SMTP_BACKEND, **backend_kwargs)
+                connection.send_messages([message])
+            self.report("new connection per message", count, start)
+
+            pool = ConnectionPool(size=1, backend=SMTP_BACKEND, **backend_kwargs)
+            start = time.perf_counter()
+            send_mass(messages, pool=pool)
+            self.report("pooled send_mass", count, start)
+            pool.close_all()
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.stdout.write(f"Stand-in server accepted {server.received} messages")
+
+    def report(self, label, count, start):
+        elapsed = time.perf_counter() - start
+        self.stdout.write(
+            f"{label:<28} {count} messages in {elapsed:.3f}s "
+            f"({count / elapsed:.1f} msg/s)"
+        )
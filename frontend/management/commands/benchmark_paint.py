@@ -0,0 +1,163 @@
+import statistics
+from html.parser import HTMLParser
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+# Roughly Lighthouse's mobile profile: slow 4G and a 4x slower CPU
+NETWORK = {
+    "offline": False,
+    "latency": 150,
+    "downloadThroughput": 1.6 * 1024 * 1024 / 8,
+    "uploadThroughput": 750 * 1024 / 8,
+}
+CPU_SLOWDOWN = 4
+# Pointer events replayed after load to time per-event work such as the eye
+POINTER_MOVES = 200
+
+# Performance.getMetrics durations (seconds) counted as main-thread work
+MAIN_THREAD_METRICS = ("ScriptDuration", "LayoutDuration", "RecalcStyleDuration")
+
+FCP_SCRIPT = """
+() => new Promise(resolve => {
+    new PerformanceObserver(list => {
+        const entry = list.getEntriesByName("first-contentful-paint")[0];
+        if (entry) resolve(entry.startTime);
+    }).observe({type: "paint", buffered: true});
+})
+"""
+
+
+class _BlockingResources(HTMLParser):
+    """Collect the stylesheets and scripts that hold up first paint"""
+
+    def __init__(self):
+        super().__init__()
+        self.in_head = self.in_noscript = False
+        self.resources = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "head":
+            self.in_head = True
+        elif tag == "noscript":
+            self.in_noscript = True
+        elif self.in_noscript:
+            return
+        elif (
+            tag == "link"
+            and attrs.get("rel") == "stylesheet"
+            and attrs.get("media", "all") in ("all", "screen")
+        ):
+            self.resources.append(attrs["href"])
+        elif (
+            tag == "script"
+            and self.in_head
+            and attrs.get("src")
+            and not {"async", "defer"} & attrs.keys()
+            and attrs.get("type") != "module"
+        ):
+            self.resources.append(attrs["src"])
+
+    def handle_endtag(self, tag):
+        if tag == "head":
+            self.in_head = False
+        elif tag == "noscript":
+            self.in_noscript = False
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the render-blocking resources of the auth page, or with --url "
+        "measure first contentful paint and main-thread time in headless "
+        "Chromium (needs Playwright)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--url",
+            action="append",
+            default=[],
+            help="Page to load in the browser; repeat to compare, e.g. the same "
+            "page served from two checkouts.",
+        )
+        parser.add_argument("--runs", type=int, default=5)
+
+    def handle(self, *args, **options):
+        if options["url"]:
+            for url in options["url"]:
+                self.measure(url, options["runs"])
+        else:
+            self.report_blocking()
+
+    def report_blocking(self):
+        response = Client(HTTP_HOST="localhost").get("/auth/")
+        html = response.content.decode()
+        parser = _BlockingResources()
+        parser.feed(html)
+
+        self.stdout.write(f"HTML: {len(response.content) / 1024:.1f} KB")
+        local_bytes = 0
+        for url in parser.resources:
+            if url.startswith(settings.STATIC_URL):
+                path = finders.find(url[len(settings.STATIC_URL) :])
+                size = Path(path).stat().st_size if path else 0
+                local_bytes += size
+                self.stdout.write(f"  blocking {url} ({size / 1024:.1f} KB)")
+            else:
+                self.stdout.write(f"  blocking {url} (external request)")
+        self.stdout.write(
+            f"{len(parser.resources)} render-blocking requests, "
+            f"{local_bytes / 1024:.1f} KB of local static files"
+        )
+
+    def measure(self, url, runs):
+        try:
+            from playwright.sync_api import sync_playwright
+        except ImportError:
+            raise CommandError(
+                "--url needs Playwright: pip install playwright && "
+                "playwright install chromium"
+            )
+
+        fcp, load, pointer = [], [], []
+        with sync_playwright() as playwright:
+            browser = playwright.chromium.launch()
+            for _ in range(runs):
+                # A fresh context per run, so nothing is served from cache
+                context = browser.new_context()
+                page = context.new_page()
+                cdp = context.new_cdp_session(page)
+                cdp.send("Network.enable")
+                cdp.send("Network.emulateNetworkConditions", NETWORK)
+                cdp.send("Emulation.setCPUThrottlingRate", {"rate": CPU_SLOWDOWN})
+                cdp.send("Performance.enable")
+
+                page.goto(url, wait_until="networkidle")
+                fcp.append(page.evaluate(FCP_SCRIPT))
+                after_load = self.main_thread_ms(cdp)
+                load.append(after_load)
+
+                for step in range(POINTER_MOVES):
+                    page.mouse.move(step * 5 % 1000, step * 3 % 700)
+                pointer.append(self.main_thread_ms(cdp) - after_load)
+                context.close()
+            browser.close()
+
+        self.stdout.write(
+            f"{url} (median of {runs} runs, {CPU_SLOWDOWN}x CPU slowdown):\n"
+            f"  first contentful paint     {statistics.median(fcp):7.0f} ms\n"
+            f"  main thread until idle     {statistics.median(load):7.1f} ms\n"
+            f"  main thread, {POINTER_MOVES} pointer moves "
+            f"{statistics.median(pointer):7.1f} ms"
+        )
+
+    def main_thread_ms(self, cdp):
+        metrics = {
+            metric["name"]: metric["value"]
+            for metric in cdp.send("Performance.getMetrics")["metrics"]
+        }
+        return sum(metrics[name] for name in MAIN_THREAD_METRICS) * 1000
@@ -0,0 +1,94 @@
+import statistics
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext, override_settings
+
+ENGINES = [
+    "django.contrib.sessions.backends.db",
+    "django.contrib.sessions.backends.cached_db",
+    "django.contrib.sessions.backends.signed_cookies",
+    "frontend.sessions",
+    "frontend.cached_sessions",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the per-request session cost (time and queries) of the "
+        "supported SESSION_ENGINE settings"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--requests", type=int, default=2000, help="Requests timed per phase."
+        )
+
+    def handle(self, *args, **options):
+        # Runs against the test database (in-memory for SQLite), never db.sqlite3
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            for engine in ENGINES:
+                with override_settings(SESSION_ENGINE=engine):
+                    caches[settings.SESSION_CACHE_ALIAS].clear()
+                    self.stdout.write(f"{engine}:")
+                    store_class = import_module(engine).SessionStore
+                    self.measure(store_class, options["requests"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def measure(self, store_class, count):
+        # Anonymous page: load the cookie's session, store a message, save
+        anonymous_keys = []
+
+        def anonymous():
+            session = store_class()
+            session["_messages"] = "[]"
+            session.save()
+            anonymous_keys.append(session.session_key)
+
+        self.report("anonymous", count, anonymous)
+
+        # Login: rotate the key and record the user, as django.contrib.auth does
+        user_keys = []
+
+        def login():
+            session = store_class(anonymous_keys.pop())
+            session.cycle_key()
+            session[SESSION_KEY] = "1"
+            session[BACKEND_SESSION_KEY] = "frontend.backends.EmailBackend"
+            session[HASH_SESSION_KEY] = "0" * 64
+            session.save()
+            user_keys.append(session.session_key)
+
+        self.report("login", count, login)
+
+        # Authenticated page: AuthenticationMiddleware reads the user id
+        keys = iter(user_keys)
+
+        def authenticated():
+            session = store_class(next(keys))
+            assert SESSION_KEY in session
+
+        self.report("authenticated read", count, authenticated)
+
+    def report(self, label, count, operation):
+        timings = []
+        query_count = 0
+        for _ in range(count):
+            # The query log is capped; keep it from filling up between samples
+            reset_queries()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                operation()
+                timings.append((time.perf_counter() - start) * 1000)
+            query_count += len(queries)
+        self.stdout.write(
+            f"  {label:<20} median {statistics.median(timings):7.3f} ms  "
+            f"{query_count / count:5.2f} queries/request"
+        )
@@ -0,0 +1,99 @@
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run parallel signups and logins against a scratch SQLite file with and "
+        "without SQLITE_PRAGMAS and report write throughput"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument(
+            "--iterations", type=int, default=200, help="Signup + login per thread."
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "sqlite":
+            raise CommandError("benchmark_sqlite only runs on the SQLite backend")
+
+        # Cheap hashing so the numbers measure the database, not PBKDF2
+        with override_settings(
+            PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+            PASSWORD_HASHING_WORKERS=0,
+        ):
+            password = make_password("benchmark")
+            for label, pragmas in (("default pragmas", {}), ("SQLITE_PRAGMAS", None)):
+                overrides = {} if pragmas is None else {"SQLITE_PRAGMAS": pragmas}
+                with override_settings(**overrides):
+                    self.run(label, password, options["threads"], options["iterations"])
+
+    def run(self, label, password, thread_count, iterations):
+        with tempfile.TemporaryDirectory() as tmp:
+            # A file database, so threads really contend for the lock
+            connection.settings_dict["TEST"]["NAME"] = str(Path(tmp) / "bench.sqlite3")
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            connection.close()
+            try:
+                ops, errors, elapsed = self.hammer(password, thread_count, iterations)
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                connection.settings_dict["TEST"]["NAME"] = None
+
+        self.stdout.write(
+            f"{label:<16} {ops} ops in {elapsed:.2f}s ({ops / elapsed:.0f} ops/s), "
+            f"{errors} 'database is locked' errors"
+        )
+
+    def hammer(self, password, thread_count, iterations):
+        counts = {"ops": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(index):
+            ops = errors = 0
+            try:
+                for i in range(iterations):
+                    email = f"bench{index}-{i}@example.com"
+                    try:
+                        # Signup: one INSERT
+                        User.objects.create(
+                            email=email, name="Bench", password=password
+                        )
+                        # Login: the handle_login lookup + last_login UPDATE
+                        user = User.objects.get(email=email)
+                        User.objects.filter(pk=user.pk).update(
+                            last_login=timezone.now()
+                        )
+                        ops += 2
+                    except OperationalError:
+                        errors += 1
+            finally:
+                connections.close_all()
+                with lock:
+                    counts["ops"] += ops
+                    counts["errors"] += errors
+
+        threads = [
+            threading.Thread(target=worker, args=(index,))
+            for index in range(thread_count)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return counts["ops"], counts["errors"], time.perf_counter() - start
@@ -0,0 +1,71 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.test.utils import override_settings
+
+from frontend.forms import LoginForm, SignUpForm
+
+TEMPLATE = "frontend/auth.html"
+# The loaders settings.py wraps in the cached loader outside DEBUG
+LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Time rendering auth.html with and without the cached template loader"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--renders", type=int, default=500, help="Renders timed per setup."
+        )
+
+    def handle(self, *args, **options):
+        engine = settings.TEMPLATES[0]
+        plain = {**engine["OPTIONS"], "loaders": LOADERS}
+        cached = {
+            **engine["OPTIONS"],
+            "loaders": [("django.template.loaders.cached.Loader", LOADERS)],
+        }
+
+        for label, template_options in (
+            ("plain loader", plain),
+            ("cached loader", cached),
+        ):
+            with override_settings(TEMPLATES=[{**engine, "OPTIONS": template_options}]):
+                self.measure(label, options["renders"])
+
+    def measure(self, label, renders):
+        request = RequestFactory().get("/auth/")
+        request.user = AnonymousUser()
+
+        def render():
+            render_to_string(
+                TEMPLATE,
+                {
+                    "signup_form": SignUpForm(),
+                    "login_form": LoginForm(),
+                    "show_login": False,
+                },
+                request=request,
+            )
+
+        # Warm-up render fills the loader cache
+        render()
+        timings = []
+        for _ in range(renders):
+            start = time.perf_counter()
+            render()
+            timings.append((time.perf_counter() - start) * 1000)
+        self.stdout.write(
+            f"{label:<14} median {statistics.median(timings):7.3f} ms  "
+            f"min {min(timings):7.3f} ms"
+        )
@@ -0,0 +1,128 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from uuid import uuid4
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from frontend.models import EmailVerificationToken, User
+
+BEFORE = "0003_user_email_ci_unique"
+AFTER = "0004_token_indexes"
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway test database with token rows and compare issue, "
+        "redeem and expiry-scan latency before and after the token indexes"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100_000)
+        parser.add_argument("--tokens", type=int, default=2_000_000)
+        parser.add_argument(
+            "--samples", type=int, default=200, help="Operations timed per phase."
+        )
+
+    def handle(self, *args, **options):
+        # Runs against the test database (in-memory for SQLite), never db.sqlite3
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            call_command("migrate", "frontend", BEFORE, verbosity=0)
+            user_ids = self.seed(options["users"], options["tokens"])
+
+            self.stdout.write(f"Without token indexes ({BEFORE}):")
+            self.measure(user_ids, options["samples"])
+
+            start = time.perf_counter()
+            call_command("migrate", "frontend", AFTER, verbosity=0)
+            self.stdout.write(
+                f"Building indexes took {time.perf_counter() - start:.2f}s"
+            )
+
+            self.stdout.write(f"With token indexes ({AFTER}):")
+            self.measure(user_ids, options["samples"])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def seed(self, user_count, token_count):
+        start = time.perf_counter()
+        User.objects.bulk_create(
+            (
+                User(email=f"bench{i}@example.com", name=f"Bench {i}", password="!")
+                for i in range(user_count)
+            ),
+            batch_size=5_000,
+        )
+        user_ids = list(User.objects.values_list("pk", flat=True))
+
+        now = timezone.now()
+        batch = []
+        for i in range(token_count):
+            # Mostly used or expired tokens, as in a table that is never purged
+            batch.append(
+                EmailVerificationToken(
+                    user_id=random.choice(user_ids),
+                    token=uuid4(),
+                    expires_at=now + timedelta(hours=random.randint(-2_000, 24)),
+                    is_used=random.random() < 0.8,
+                )
+            )
+            if len(batch) == 10_000:
+                EmailVerificationToken.objects.bulk_create(batch)
+                batch = []
+        EmailVerificationToken.objects.bulk_create(batch)
+
+        self.stdout.write(
+            f"Seeded {user_count} users and {token_count} tokens in "
+            f"{time.perf_counter() - start:.1f}s"
+        )
+        return user_ids
+
+    def measure(self, user_ids, samples):
+        # Distinct users, so no issued token is deleted before it is redeemed
+        users = iter(random.sample(user_ids, samples))
+
+        def issue():
+            user_id = next(users)
+            EmailVerificationToken.objects.filter(
+                user_id=user_id, is_used=False
+            ).delete()
+            return EmailVerificationToken.objects.create(user_id=user_id).token
+
+        issued = []
+        self.report("issue", samples, lambda: issued.append(issue()))
+
+        def redeem():
+            token = EmailVerificationToken.objects.get(token=issued.pop())
+            token.is_used = True
+            token.save(update_fields=["is_used"])
+
+        self.report("redeem", samples, redeem)
+
+        def expiry_scan():
+            EmailVerificationToken.objects.filter(
+                is_used=False, expires_at__lt=timezone.now()
+            ).count()
+
+        self.report("expired unused count", max(samples // 20, 1), expiry_scan)
+
+    def report(self, label, samples, operation):
+        timings = []
+        for _ in range(samples):
+            start = time.perf_counter()
+            operation()
+            timings.append((time.perf_counter() - start) * 1000)
+        p95 = (
+            statistics.quantiles(timings, n=20, method="inclusive")[-1]
+            if len(timings) > 1
+            else timings[0]
+        )
+        self.stdout.write(
+            f"  {label:<22} median {statistics.median(timings):8.3f} ms  "
+            f"p95 {p95:8.3f} ms"
+        )
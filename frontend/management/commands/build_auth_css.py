@@ -0,0 +1,94 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser
+from django.contrib.staticfiles import finders
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+
+from frontend.critical_css import index_page, parse, render, split
+from frontend.forms import LoginForm, SignUpForm
+
+SOURCE = "frontend/css/style.css"
+CRITICAL = "frontend/css/auth.critical.css"
+DEFERRED = "frontend/css/auth.deferred.css"
+FONT_DIR = "frontend/fonts"
+FONT_WEIGHTS = (400, 500, 700)
+# Google Fonts' "latin" unicode-range; the pages are English only
+LATIN = (
+    "U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,U+0304,"
+    "U+0308,U+0329,U+2000-206F,U+20AC,U+2122,U+2191,U+2193,U+2212,U+2215,"
+    "U+FEFF,U+FFFD"
+)
+
+class Command(BaseCommand):
+    help = (
+        "Split style.css into the rules auth.html needs for first paint (inlined) "
+        "and the rest (loaded async), optionally rebuilding the self-hosted "
+        "Montserrat subsets"
+    )
+    # It writes the files the static reference check looks for
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fonts-from",
+            metavar="TTF",
+            help="Write Latin-subset woff2 files of the Montserrat weights in use "
+            "from this variable font (Montserrat[wght].ttf); needs fontTools.",
+        )
+
+    def handle(self, *args, **options):
+        static_dir = Path(apps.get_app_config("frontend").path) / "static"
+        source = finders.find(SOURCE)
+        if not source:
+            raise CommandError(f"{SOURCE} not found")
+
+        # auth.html inlines the critical CSS, so it has to exist to render
+        (static_dir / CRITICAL).touch()
+        page = index_page(self.render_signup(), hidden_class="hidden")
+        critical, deferred = split(parse(Path(source).read_text()), page)
+        self.write(static_dir / CRITICAL, render(critical))
+        self.write(static_dir / DEFERRED, render(deferred))
+
+        if options["fonts_from"]:
+            self.subset_fonts(static_dir, options["fonts_from"])
+
+    def render_signup(self):
+        # Only the first GET: the (hidden) login panel, messages and field
+        # errors can wait for the deferred stylesheet
+        request = RequestFactory().get("/auth/")
+        request.user = AnonymousUser()
+        context = {"signup_form": SignUpForm(), "login_form": LoginForm()}
+        return render_to_string("frontend/auth.html", context, request=request)
+
+    def subset_fonts(self, static_dir, source):
+        try:
+            from fontTools import subset
+            from fontTools.ttLib import TTFont
+            from fontTools.varLib.instancer import instantiateVariableFont
+        except ImportError:
+            raise CommandError(
+                "--fonts-from needs fontTools: pip install fonttools brotli"
+            )
+
+        font_dir = static_dir / FONT_DIR
+        font_dir.mkdir(parents=True, exist_ok=True)
+        options = subset.Options()
+        options.flavor = "woff2"
+        # The @font-face rules in style.css point at these files
+        for weight in FONT_WEIGHTS:
+            font = instantiateVariableFont(TTFont(source), {"wght": weight})
+            subsetter = subset.Subsetter(options)
+            subsetter.populate(unicodes=subset.parse_unicodes(LATIN))
+            subsetter.subset(font)
+            path = font_dir / f"montserrat-{weight}-latin.woff2"
+            subset.save_font(font, path, options)
+            self.stdout.write(
+                f"Wrote {path.name} ({path.stat().st_size / 1024:.1f} KB)"
+            )
+
+    def write(self, path, content):
+        path.write_text(content + "\n")
+        self.stdout.write(f"Wrote {path.name} ({len(content.encode()) / 1024:.1f} KB)")
@@ -0,0 +1,86 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from frontend.checks import pictured_images
+from frontend.images import (VARIANTS_DIR, build_variants, read_manifest,
+                             write_manifest)
+
+SOURCE_DIR = "frontend/images"
+EXTENSIONS = {".png", ".jpg", ".jpeg"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Write resized PNG/JPEG and WebP variants of the images the templates "
+        "render with {% picture %}, and the manifest the tag reads"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "names",
+            nargs="*",
+            help="Image file names under static/frontend/images to rebuild "
+            "(default: every image used by a {% picture %} tag).",
+        )
+        parser.add_argument("--quality", type=int, default=80)
+        parser.add_argument(
+            "--min-bytes",
+            type=int,
+            default=10_000,
+            help="Skip pictured images smaller than this; tiny icons gain nothing.",
+        )
+
+    def handle(self, *args, **options):
+        static_dir = Path(apps.get_app_config("frontend").path) / "static"
+        source_dir = static_dir / SOURCE_DIR
+        out_dir = static_dir / VARIANTS_DIR
+        out_dir.mkdir(parents=True, exist_ok=True)
+
+        if options["names"]:
+            # Rebuild just these and keep the other images' variants
+            sources = [source_dir / name for name in options["names"]]
+            entries = read_manifest(out_dir)
+            for source in sources:
+                old = entries.pop(f"{SOURCE_DIR}/{source.name}", None)
+                for variant in (old or {}).get("variants", []):
+                    (out_dir / Path(variant["path"]).name).unlink(missing_ok=True)
+        else:
+            sources = sorted(
+                static_dir / name
+                for name in pictured_images()
+                if name.startswith(f"{SOURCE_DIR}/")
+                and Path(name).suffix.lower() in EXTENSIONS
+                and (static_dir / name).stat().st_size >= options["min_bytes"]
+            )
+            entries = {}
+            # Everything is regenerated, so start from a clean directory
+            for old in out_dir.iterdir():
+                old.unlink()
+
+        for source in sources:
+            name = f"{SOURCE_DIR}/{source.name}"
+            entry = build_variants(name, source, out_dir, quality=options["quality"])
+            entries[name] = entry
+
+            widest = max(variant["width"] for variant in entry["variants"])
+            largest = {
+                variant["format"]: variant["bytes"]
+                for variant in entry["variants"]
+                if variant["width"] == widest
+            }
+            webp = (
+                f"{largest['webp'] / 1024:6.0f} KB webp"
+                if "webp" in largest
+                else "no smaller webp"
+            )
+            widths = {variant["width"] for variant in entry["variants"]}
+            self.stdout.write(
+                f"{source.name:<22} {source.stat().st_size / 1024:8.0f} KB -> "
+                f"{largest[entry['fallback']] / 1024:6.0f} KB {entry['fallback']}, "
+                f"{webp} at {widest}px ({len(widths)} widths)"
+            )
+
+        write_manifest(out_dir, entries)
+        self.stdout.write(f"Wrote {len(entries)} manifest entries to {out_dir}")
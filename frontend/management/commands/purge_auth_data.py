@@ -0,0 +1,115 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from frontend.models import (EmailVerificationToken, OutboundEmail,
+                             PasswordResetToken)
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete used/expired auth tokens, expired sessions, delivered outbox "
+        "emails and stale unverified users in small chunks, so it can run "
+        "alongside live traffic"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Rows deleted per transaction.",
+        )
+        parser.add_argument(
+            "--max-rate",
+            type=float,
+            default=0,
+            help="Maximum rows deleted per second (0 for no limit).",
+        )
+        parser.add_argument(
+            "--unverified-hours",
+            type=int,
+            default=24,
+            help="Delete unverified users created more than this many hours ago.",
+        )
+        parser.add_argument(
+            "--sent-email-days",
+            type=int,
+            default=7,
+            help="Delete outbox emails delivered more than this many days ago.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only count what would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+        self.chunk_size = options["chunk_size"]
+        self.max_rate = options["max_rate"]
+        self.dry_run = options["dry_run"]
+
+        now = timezone.now()
+        dead_token = Q(is_used=True) | Q(expires_at__lt=now)
+        stale_cutoff = now - timedelta(hours=options["unverified_hours"])
+
+        self.purge(
+            "email verification tokens",
+            EmailVerificationToken.objects.filter(dead_token),
+        )
+        self.purge(
+            "password reset tokens", PasswordResetToken.objects.filter(dead_token)
+        )
+        # Signed-cookie sessions never reach the table; this prunes the rest
+        self.purge("expired sessions", Session.objects.filter(expire_date__lt=now))
+        # Failed emails are kept for inspection
+        self.purge(
+            "sent emails",
+            OutboundEmail.objects.filter(
+                status=OutboundEmail.Status.SENT,
+                sent_at__lt=now - timedelta(days=options["sent_email_days"]),
+            ),
+        )
+        # Tokens of these users go with them through the CASCADE
+        self.purge(
+            "unverified users",
+            User.objects.filter(is_verified_email=False, created_at__lt=stale_cutoff),
+        )
+
+    def purge(self, label, queryset):
+        if self.dry_run:
+            self.stdout.write(f"Would delete {queryset.count()} {label}")
+            return
+
+        started = time.monotonic()
+        last_pk = None
+        deleted = 0
+        while True:
+            # Keyset pagination: each chunk is an index range scan from last_pk
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            pks = list(
+                chunk.order_by("pk").values_list("pk", flat=True)[: self.chunk_size]
+            )
+            if not pks:
+                break
+            last_pk = pks[-1]
+
+            # Re-apply the filter so rows that changed since the SELECT are kept
+            with transaction.atomic():
+                _, per_model = queryset.filter(pk__in=pks).delete()
+            deleted += per_model.get(queryset.model._meta.label, 0)
+
+            if self.max_rate:
+                ahead = deleted / self.max_rate - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+        self.stdout.write(f"Deleted {deleted} {label}")
@@ -0,0 +1,97 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from frontend.mailer import get_connection_pool
+from frontend.outbox import claim_batch, deliver_batch
+
+
+def _deliver_in_thread(pks, max_attempts, backoff):
+    try:
+        return deliver_batch(pks, max_attempts, backoff)
+    finally:
+        # Each pool thread gets its own DB connection; don't leak them
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Deliver emails queued in the outbox, retrying failures with backoff"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "EMAIL_OUTBOX_WORKERS", 4),
+            help="Number of delivery threads.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Maximum emails claimed per poll.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=getattr(settings, "EMAIL_OUTBOX_MAX_ATTEMPTS", 5),
+            help="Attempts before an email is marked as failed.",
+        )
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=getattr(settings, "EMAIL_OUTBOX_BACKOFF", 30),
+            help="Base retry delay in seconds, doubled on each attempt.",
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            default=300,
+            help="Seconds before an unfinished claim is retried by another worker.",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=5,
+            help="Seconds to sleep when the outbox is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the currently due emails and exit.",
+        )
+
+    def handle(self, *args, **options):
+        workers = options["workers"]
+        max_attempts = options["max_attempts"]
+        backoff = options["backoff"]
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                while True:
+                    claimed = claim_batch(
+                        options["batch_size"], options["lease"], max_attempts
+                    )
+                    if claimed:
+                        # One chunk per thread, each sent over a single connection
+                        chunks = [claimed[i::workers] for i in range(workers)]
+                        sent = sum(
+                            pool.map(
+                                lambda pks: _deliver_in_thread(
+                                    pks, max_attempts, backoff
+                                ),
+                                [chunk for chunk in chunks if chunk],
+                            )
+                        )
+                        self.stdout.write(
+                            f"Delivered {sent} of {len(claimed)} queued emails"
+                        )
+                        continue
+
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+        finally:
+            get_connection_pool().close_all()
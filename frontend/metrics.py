@@ -0,0 +1,222 @@
+"""
+Request instrumentation for InstrumentationMiddleware.
+
+Each request gets a RequestMetrics in a context variable. Database queries
+are timed through an execute wrapper; templates, password hashing and email
+dispatch report themselves with timed(), which does nothing outside an
+instrumented request. Finished requests are aggregated per view in `registry`,
+which renders the Prometheus text format. Numbers are per process.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+PHASES = ("db", "template", "hash", "email")
+
+# Upper bounds (seconds) of the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Queries kept per request for the slow request log; all are counted
+MAX_RECORDED_QUERIES = 100
+
+_current = ContextVar("request_metrics", default=None)
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.total = None
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.query_count = 0
+        self.queries = []  # (sql, seconds)
+
+    def record_query(self, execute, sql, params, many, context):
+        """Execute wrapper; see connection.execute_wrapper()"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.durations["db"] += duration
+            self.query_count += 1
+            if len(self.queries) < MAX_RECORDED_QUERIES:
+                self.queries.append((sql, duration))
+
+    def finish(self):
+        self.total = time.perf_counter() - self.started
+
+    def server_timing(self):
+        entries = [
+            f"db;dur={self.durations['db'] * 1000:.1f};"
+            f'desc="{self.query_count} queries"'
+        ]
+        entries += [
+            f"{phase};dur={self.durations[phase] * 1000:.1f}" for phase in PHASES[1:]
+        ]
+        entries.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def start_request():
+    """Install a fresh RequestMetrics; returns it and the reset token"""
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def timed(phase):
+    """Add the time spent in the block to `phase` of the current request"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.durations[phase] += time.perf_counter() - started
+
+
+def install_template_timing():
+    """
+    Time template rendering by wrapping the Django backend's Template.render,
+    which runs once per render()/render_to_string() (includes are nested in
+    it, so they aren't counted twice).
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, "timed", False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        with timed("template"):
+            return original(self, context, request)
+
+    render.timed = True
+    Template.render = render
+
+
+def _labels(**labels):
+    def escape(value):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+        return value.replace("\n", "\\n")
+
+    return ",".join(f'{name}="{escape(value)}"' for name, value in labels.items())
+
+
+class Registry:
+    """Per-view totals since the process started, for the metrics endpoint"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = {}
+
+    def observe(self, view, status, metrics):
+        with self._lock:
+            stats = self._views.setdefault(
+                view,
+                {
+                    "statuses": {},
+                    "buckets": [0] * len(DURATION_BUCKETS),
+                    "count": 0,
+                    "sum": 0.0,
+                    "queries": 0,
+                    "phases": dict.fromkeys(PHASES, 0.0),
+                },
+            )
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if metrics.total <= bound:
+                    stats["buckets"][i] += 1
+            stats["count"] += 1
+            stats["sum"] += metrics.total
+            stats["queries"] += metrics.query_count
+            for phase, duration in metrics.durations.items():
+                stats["phases"][phase] += duration
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+
+    def render(self):
+        with self._lock:
+            views = sorted(self._views.items())
+            lines = [
+                "# HELP frontend_requests_total Requests by view and status code.",
+                "# TYPE frontend_requests_total counter",
+            ]
+            for view, stats in views:
+                for status, count in sorted(stats["statuses"].items()):
+                    labels = _labels(view=view, status=status)
+                    lines.append(f"frontend_requests_total{{{labels}}} {count}")
+
+            lines += [
+                "# HELP frontend_request_duration_seconds Wall time by view.",
+                "# TYPE frontend_request_duration_seconds histogram",
+            ]
+            for view, stats in views:
+                name = "frontend_request_duration_seconds"
+                for bound, count in zip(DURATION_BUCKETS, stats["buckets"]):
+                    lines.append(
+                        f"{name}_bucket{{{_labels(view=view, le=bound)}}} {count}"
+                    )
+                inf = _labels(view=view, le="+Inf")
+                lines += [
+                    f'{name}_bucket{{{inf}}} {stats["count"]}',
+                    f'{name}_sum{{{_labels(view=view)}}} {stats["sum"]:.6f}',
+                    f'{name}_count{{{_labels(view=view)}}} {stats["count"]}',
+                ]
+
+            lines += [
+                "# HELP frontend_request_phase_seconds_total Time spent in the "
+                "database, templates, password hashing and email dispatch.",
+                "# TYPE frontend_request_phase_seconds_total counter",
+            ]
+            for view, stats in views:
+                for phase, duration in stats["phases"].items():
+                    lines.append(
+                        "frontend_request_phase_seconds_total"
+                        f"{{{_labels(view=view, phase=phase)}}} {duration:.6f}"
+                    )
+
+            lines += [
+                "# HELP frontend_db_queries_total Database queries by view.",
+                "# TYPE frontend_db_queries_total counter",
+            ]
+            for view, stats in views:
+                lines.append(
+                    f'frontend_db_queries_total{{{_labels(view=view)}}} '
+                    f'{stats["queries"]}'
+                )
+
+        # Imported here: hashing reports its time through timed()
+        from frontend.hashing import get_hashing_pool
+
+        pool = get_hashing_pool()
+        if pool is not None:
+            stats = pool.stats()
+            lines += [
+                "# TYPE frontend_hashing_pool_pending gauge",
+                f'frontend_hashing_pool_pending {stats["pending"]}',
+                "# TYPE frontend_hashing_pool_completed_total counter",
+                f'frontend_hashing_pool_completed_total {stats["completed"]}',
+                "# TYPE frontend_hashing_pool_rejected_total counter",
+                f'frontend_hashing_pool_rejected_total {stats["rejected"]}',
+                "# TYPE frontend_hashing_pool_avg_latency_seconds gauge",
+                "frontend_hashing_pool_avg_latency_seconds "
+                f'{stats["avg_latency_ms"] / 1000:.6f}',
+                "# TYPE frontend_hashing_pool_max_latency_seconds gauge",
+                "frontend_hashing_pool_max_latency_seconds "
+                f'{stats["max_latency_ms"] / 1000:.6f}',
+            ]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
@@ -0,0 +1,139 @@
+import logging
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.utils.deprecation import MiddlewareMixin
+
+from frontend import metrics
+from frontend.hashing import HashingPoolBusy
+from frontend.routers import unpin
+from frontend.user_cache import end_request_memo, start_request_memo
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentationMiddleware:
+    """
+    Time each request by phase (database, templates, password hashing, email)
+    and report it in a Server-Timing header, at the Prometheus metrics
+    endpoint and, above INSTRUMENTATION_SLOW_REQUEST_MS, in the log with its
+    queries. Only active when INSTRUMENTATION_ENABLED is set.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, "INSTRUMENTATION_ENABLED", False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.slow_ms = getattr(settings, "INSTRUMENTATION_SLOW_REQUEST_MS", 500)
+        metrics.install_template_timing()
+
+    def __call__(self, request):
+        request_metrics, token = metrics.start_request()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(request_metrics.record_query)
+                    )
+                response = self.get_response(request)
+        finally:
+            metrics.end_request(token)
+        request_metrics.finish()
+
+        match = request.resolver_match
+        view = match.view_name if match else "unmatched"
+        response["Server-Timing"] = request_metrics.server_timing()
+        metrics.registry.observe(view, response.status_code, request_metrics)
+        if request_metrics.total * 1000 >= self.slow_ms:
+            self.log_slow_request(request, view, request_metrics)
+        return response
+
+    def log_slow_request(self, request, view, request_metrics):
+        phases = ", ".join(
+            f"{phase} {duration * 1000:.0f} ms"
+            for phase, duration in request_metrics.durations.items()
+        )
+        queries = "".join(
+            f"\n  {duration * 1000:7.1f} ms  {sql}"
+            for sql, duration in request_metrics.queries
+        )
+        logger.warning(
+            f"Slow request {request.method} {request.path} ({view}): "
+            f"{request_metrics.total * 1000:.0f} ms; {phases}; "
+            f"{request_metrics.query_count} queries:{queries}"
+        )
+
+
+class HashingBackpressureMiddleware(MiddlewareMixin):
+    """Answer 503 straight away when the password hashing pool is saturated"""
+
+    # MiddlewareMixin makes it sync and async capable; only process_exception
+    # is defined, so requests pass straight through
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingPoolBusy):
+            response = HttpResponse(
+                "The server is busy. Please try again in a moment.", status=503
+            )
+            response["Retry-After"] = "1"
+            return response
+        return None
+
+
+class PrimaryPinningMiddleware:
+    """Start every request reading from replicas until it writes"""
+
+    # Async too, so ASGI requests to the async views aren't sent through a
+    # thread just for this
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        unpin()
+        try:
+            return self.get_response(request)
+        finally:
+            unpin()
+
+    async def __acall__(self, request):
+        unpin()
+        try:
+            return await self.get_response(request)
+        finally:
+            unpin()
+
+
+class UserLookupMemoMiddleware:
+    """Give each request its own memo for lookup_user_by_email()"""
+
+    sync_capable = async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = start_request_memo()
+        try:
+            return self.get_response(request)
+        finally:
+            end_request_memo(token)
+
+    async def __acall__(self, request):
+        token = start_request_memo()
+        try:
+            return await self.get_response(request)
+        finally:
+            end_request_memo(token)
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 00:56
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('frontend', '0002_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='user',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('email'), name='frontend_user_email_ci_unique'),
+        ),
+    ]
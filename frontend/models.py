@@ -4,8 +4,11 @@ from uuid import uuid4
 from django.contrib.auth.models import (AbstractBaseUser, BaseUserManager,
                                         PermissionsMixin)
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
+from frontend import hashing
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email: str, name: str, password: Optional[str] = None):
@@ -52,9 +55,30 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["name"]
 
+    class Meta:
+        constraints = [
+            # Backs the LOWER(email) lookup in signup and stops concurrent
+            # signups that differ only in case
+            models.UniqueConstraint(Lower("email"), name="frontend_user_email_ci_unique")
+        ]
+
     def __str__(self):
         return self.email
 
+    def set_password(self, raw_password):
+        # Hash on the shared process pool instead of the request thread
+        self.password = hashing.make_password(raw_password)
+        self._password = raw_password
+
+    def check_password(self, raw_password):
+        def setter(raw_password):
+            self.set_password(raw_password)
+            # Password hash upgrades shouldn't be considered password changes.
+            self._password = None
+            self.save(update_fields=["password"])
+
+        return hashing.check_password(raw_password, self.password, setter)
+
 
 class EmailVerificationToken(models.Model):
     """Mode to store email verification token"""
@@ -65,6 +89,19 @@ class EmailVerificationToken(models.Model):
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            # filter(user=user, is_used=False) when issuing a new token
+            models.Index(fields=["user", "is_used"], name="frontend_evt_user_used_idx"),
+            # Expiry scans only care about live tokens. Partial indexes are
+            # skipped on backends without support for them (MySQL, Oracle)
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(is_used=False),
+                name="frontend_evt_expires_idx",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.expires_at:  # Token expires after 24 hours
             self.expires_at = timezone.now() + timezone.timedelta(hours=24)
@@ -86,6 +123,16 @@ class PasswordResetToken(models.Model):
     expires_at = models.DateTimeField()
     is_used = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "is_used"], name="frontend_prt_user_used_idx"),
+            models.Index(
+                fields=["expires_at"],
+                condition=models.Q(is_used=False),
+                name="frontend_prt_expires_idx",
+            ),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.expires_at:
             # Token expires in 1 hour
@@ -97,3 +144,34 @@ class PasswordResetToken(models.Model):
 
     def __str__(self):
         return f"Password reset token for {self.user.email}"
+
+
+class OutboundEmail(models.Model):
+    """Model to queue outgoing emails for background delivery"""
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        SENDING = "sending", "Sending"
+        SENT = "sent", "Sent"
+        FAILED = "failed", "Failed"
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    html_body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254)
+    to_email = models.EmailField()
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Also used as the lease expiry while a worker holds the row
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"])]
+
+    def __str__(self):
+        return f"{self.subject} to {self.to_email} ({self.status})"
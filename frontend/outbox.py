@@ -0,0 +1,163 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, send_mail
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .mailer import get_connection_pool
+from .metrics import timed
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_email(subject, message, recipient, html_message=""):
+    """Queue an email in the outbox, or send it inline when the outbox is off"""
+    with timed("email"):
+        if not getattr(settings, "EMAIL_OUTBOX_ENABLED", True):
+            with get_connection_pool().connection() as connection:
+                send_mail(
+                    subject=subject,
+                    message=message,
+                    from_email=settings.DEFAULT_FROM_EMAIL,
+                    recipient_list=[recipient],
+                    html_message=html_message or None,
+                    fail_silently=False,
+                    connection=connection,
+                )
+            return None
+
+        return OutboundEmail.objects.create(
+            subject=subject,
+            body=message,
+            html_body=html_message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to_email=recipient,
+        )
+
+
+def claim_batch(limit, lease_seconds, max_attempts):
+    """
+    Claim up to `limit` due emails for this worker.
+
+    A row is claimed with a conditional UPDATE, so concurrent workers never
+    deliver the same email twice. Each claim counts as an attempt and gives
+    the row a lease; if the worker dies before recording a result the row
+    becomes due again once the lease ends, and is marked failed instead once
+    it has used up `max_attempts`.
+    """
+    now = timezone.now()
+    claimable = Q(status=OutboundEmail.Status.PENDING) | Q(
+        status=OutboundEmail.Status.SENDING
+    )
+    OutboundEmail.objects.filter(
+        status=OutboundEmail.Status.SENDING,
+        next_attempt_at__lte=now,
+        attempts__gte=max_attempts,
+    ).update(
+        status=OutboundEmail.Status.FAILED,
+        last_error="Lease expired before the worker recorded a result",
+    )
+    due = (
+        OutboundEmail.objects.filter(claimable, next_attempt_at__lte=now)
+        .order_by("next_attempt_at")
+        .values_list("pk", "next_attempt_at")[:limit]
+    )
+
+    lease_until = now + timedelta(seconds=lease_seconds)
+    claimed = []
+    for pk, next_attempt_at in due:
+        updated = OutboundEmail.objects.filter(
+            claimable, pk=pk, next_attempt_at=next_attempt_at
+        ).update(
+            status=OutboundEmail.Status.SENDING,
+            attempts=F("attempts") + 1,
+            next_attempt_at=lease_until,
+        )
+        if updated:
+            claimed.append(pk)
+    return claimed
+
+
+def deliver(pk, max_attempts, backoff_seconds, connection=None):
+    """Send one claimed email and record the outcome"""
+    email = OutboundEmail.objects.get(pk=pk)
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        to=[email.to_email],
+        connection=connection,
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, "text/html")
+
+    # claim_batch() already counted this attempt
+    attempts = email.attempts
+    try:
+        message.send(fail_silently=False)
+    except Exception as e:
+        if attempts >= max_attempts:
+            status = OutboundEmail.Status.FAILED
+            next_attempt_at = email.next_attempt_at
+        else:
+            status = OutboundEmail.Status.PENDING
+            # Exponential backoff: base, 2x base, 4x base, ...
+            delay = backoff_seconds * 2 ** (attempts - 1)
+            next_attempt_at = timezone.now() + timedelta(seconds=delay)
+
+        OutboundEmail.objects.filter(pk=pk).update(
+            status=status,
+            last_error=str(e),
+            next_attempt_at=next_attempt_at,
+        )
+        logger.error(
+            f"Failed to deliver email {pk} to {email.to_email} "
+            f"(attempt {attempts}/{max_attempts}): {str(e)}"
+        )
+        return False
+
+    OutboundEmail.objects.filter(pk=pk).update(
+        status=OutboundEmail.Status.SENT,
+        last_error="",
+        sent_at=timezone.now(),
+    )
+    logger.info(f"Delivered email {pk} to {email.to_email}")
+    return True
+
+
+def _acquire(pool):
+    try:
+        return pool.acquire()
+    except Exception as e:
+        # Fall back to per-message connections so each failure is recorded
+        logger.error(f"Could not open pooled mail connection: {str(e)}")
+        return None
+
+
+def deliver_batch(pks, max_attempts, backoff_seconds):
+    """Deliver claimed emails over one pooled connection, returning the sent count"""
+    pool = get_connection_pool()
+    connection = _acquire(pool)
+    sent = 0
+    try:
+        for pk in pks:
+            try:
+                delivered = deliver(pk, max_attempts, backoff_seconds, connection)
+            except Exception:
+                # e.g. the row was deleted after it was claimed; its lease
+                # expiry handles anything that is still in the table
+                logger.exception(f"Could not deliver email {pk}, skipping it")
+                continue
+            if delivered:
+                sent += 1
+            elif connection is not None:
+                # The SMTP session may be dead or mid-command; start a new one
+                pool.discard(connection)
+                connection = _acquire(pool)
+        return sent
+    finally:
+        if connection is not None:
+            pool.release(connection)
@@ -0,0 +1,131 @@
+"""
+Rate limits for the auth endpoints, per client IP and per email.
+
+Each limit of N requests per period is a counter per fixed window of that
+period, kept in the RATE_LIMIT_CACHE_ALIAS cache so every worker shares it.
+Counters only move through cache.add() and cache.incr(), which are atomic in
+Redis, Memcached and locmem, so parallel requests can't all read the same
+count and slip through together. Bursts can reach 2N across a window
+boundary. If the shared cache is unreachable, limits fall back to a
+per-process cache rather than letting everything through.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
+
+from frontend.user_cache import normalize_email
+
+logger = logging.getLogger(__name__)
+
+RATE = re.compile(r"^(\d+)/(\d*)([smhd])$")
+UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+_fallback = LocMemCache("frontend-ratelimit", {"OPTIONS": {"MAX_ENTRIES": 10000}})
+
+
+def parse_rate(rate):
+    """Turn "5/m" or "10/15m" into (requests, period in seconds)"""
+    match = RATE.match(rate)
+    if not match:
+        raise ValueError(f"Invalid rate {rate!r}, expected e.g. '5/m' or '10/15m'")
+    count, multiplier, unit = match.groups()
+    return int(count), int(multiplier or 1) * UNITS[unit]
+
+
+def client_ip(request):
+    header = getattr(settings, "RATE_LIMIT_CLIENT_IP_HEADER", None)
+    if header and request.META.get(header):
+        # The last hop was added by our own proxy; earlier ones can be forged
+        return request.META[header].split(",")[-1].strip()
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def _buckets(request, scope):
+    """Yield (key prefix, rate) for each limit configured for scope"""
+    limits = getattr(settings, "RATE_LIMITS", {}).get(scope, {})
+    identities = {
+        "ip": client_ip(request),
+        "email": normalize_email(request.POST.get("email", "")),
+    }
+    for kind, rate in limits.items():
+        if identities[kind]:
+            digest = hashlib.sha256(identities[kind].encode()).hexdigest()
+            yield f"frontend:ratelimit:{scope}:{kind}:{digest}", rate
+
+
+def _window(key, rate):
+    """Return (counter key, limit, window length, seconds until it resets)"""
+    count, period = parse_rate(rate)
+    now = time.time()
+    window = int(now // period)
+    return f"{key}:{window}", count, period, (window + 1) * period - now
+
+
+def _shared():
+    return caches[getattr(settings, "RATE_LIMIT_CACHE_ALIAS", "default")]
+
+
+def _hit(cache, key, period):
+    cache.add(key, 0, period)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr()
+        cache.set(key, 1, period)
+        return 1
+
+
+async def _ahit(cache, key, period):
+    await cache.aadd(key, 0, period)
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        await cache.aset(key, 1, period)
+        return 1
+
+
+def _cache_error(exc):
+    logger.warning(f"Rate limit cache unavailable, limiting per process: {exc}")
+
+
+def check(request, scope):
+    """Count the request against each of scope's limits; return seconds to wait"""
+    for bucket, rate in _buckets(request, scope):
+        key, count, period, retry_after = _window(bucket, rate)
+        try:
+            hits = _hit(_shared(), key, period)
+        except Exception as exc:
+            _cache_error(exc)
+            hits = _hit(_fallback, key, period)
+        if hits > count:
+            return retry_after
+    return 0
+
+
+async def acheck(request, scope):
+    for bucket, rate in _buckets(request, scope):
+        key, count, period, retry_after = _window(bucket, rate)
+        try:
+            hits = await _ahit(_shared(), key, period)
+        except Exception as exc:
+            _cache_error(exc)
+            hits = _hit(_fallback, key, period)
+        if hits > count:
+            return retry_after
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        "Too many attempts. Please wait a moment and try again.", status=429
+    )
+    response["Retry-After"] = str(math.ceil(retry_after))
+    return response
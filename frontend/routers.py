@@ -0,0 +1,47 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Set once the current request (or task) has written to the primary
+_pinned_to_primary = ContextVar("pinned_to_primary", default=False)
+
+# Apps whose reads must never see replication lag
+PRIMARY_ONLY_APPS = {"sessions"}
+
+
+def pin_to_primary():
+    _pinned_to_primary.set(True)
+
+
+def unpin():
+    _pinned_to_primary.set(False)
+
+
+class PrimaryReplicaRouter:
+    """
+    Send pure reads to a random alias from DATABASE_REPLICAS and everything else
+    to "default". After the first write, reads in the same request go to the
+    primary too, so a request always sees its own writes.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_REPLICAS", [])
+        if (
+            not replicas
+            or _pinned_to_primary.get()
+            or model._meta.app_label in PRIMARY_ONLY_APPS
+        ):
+            return "default"
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        pin_to_primary()
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -1,32 +1,82 @@
 from datetime import timedelta
 
-from django.contrib.auth import authenticate, get_user_model
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate, authenticate, get_user_model
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
+from frontend.hashing import amake_password
 from frontend.models import EmailVerificationToken, PasswordResetToken
-from frontend.utils import send_password_reset_email, send_verification_email
+from frontend.tokens import (email_verification_token, is_db_token,
+                             password_reset_token)
+from frontend.user_cache import (alookup_user_by_email, invalidate_user,
+                                 lookup_user_by_email)
+from frontend.utils import (asend_password_reset_email, asend_verification_email,
+                            send_password_reset_email, send_verification_email)
 
 User = get_user_model()
 
 # ---------------- AUTH / SIGNUP / LOGIN ----------------
 
 
+def _existing_signup(user):
+    """
+    Outcome of signing up with the email of `user` (None if it's free):
+    (user, outcome), or None when a new user should be inserted. Stale
+    unverified users are replaced.
+    """
+    if user is None:
+        return None
+    if user.is_verified_email:  # type: ignore
+        return None, "exists"
+    if user.created_at >= timezone.now() - timedelta(hours=24):  # type: ignore
+        return user, "resend"  # signal to resend email
+    return None
+
+
+def _insert_user(new_user, stale_user=None):
+    """
+    Save `new_user`, replacing `stale_user`, in one transaction. If a
+    concurrent signup wins the race, the case-insensitive unique constraint on
+    email rejects our INSERT and the email is reported as taken.
+    """
+    try:
+        with transaction.atomic():
+            if stale_user is not None:
+                # Only while still unverified; otherwise the INSERT fails
+                User.objects.filter(pk=stale_user.pk, is_verified_email=False).delete()
+            new_user.save()
+    except IntegrityError:
+        return None, "exists"
+    return new_user, "success"
+
+
+def _signup_user(form):
+    """
+    Look up the signup email and create the user unless it's taken. Returns
+    (user, outcome).
+
+    form.save(commit=False) hashes the password, so it only runs once a user
+    will actually be inserted, and before the transaction starts so the write
+    lock isn't held while PBKDF2 runs.
+    """
+    existing_user = lookup_user_by_email(form.cleaned_data["email"])
+    outcome = _existing_signup(existing_user)
+    if outcome is not None:
+        return outcome
+    return _insert_user(form.save(commit=False), existing_user)
+
+
 def handle_signup(request, form):
     """Process signup form logic"""
-    email = form.cleaned_data.get("email")
-    existing_user = User.objects.filter(email=email).first()
-
-    if existing_user:
-        if not existing_user.is_verified_email:  # type: ignore
-            if existing_user.created_at < timezone.now() - timedelta(hours=24):  # type: ignore
-                existing_user.delete()
-            else:
-                send_verification_email(request, existing_user)
-                return "resend"  # signal to resend email
-        else:
-            return "exists"
-
-    user = form.save()
+    user, result = _signup_user(form)
+
+    if result == "resend":
+        send_verification_email(request, user)
+        return "resend"
+    if result == "exists":
+        return "exists"
+
     if send_verification_email(request, user):
         return "success"
     return "fail"
@@ -37,9 +87,8 @@ def handle_login(request, form):
     email = form.cleaned_data["email"]
     password = form.cleaned_data["password"]
 
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
+    user = lookup_user_by_email(email)
+    if user is None:
         return None, "invalid"
 
     if not user.is_verified_email:  # type: ignore
@@ -48,7 +97,8 @@ def handle_login(request, form):
     if not user.is_active:
         return user, "inactive"
 
-    user = authenticate(request, email=email, password=password)
+    # Check the password on the instance loaded above (see EmailBackend)
+    user = authenticate(request, user=user, password=password)
     if not user:
         return None, "invalid"
 
@@ -60,8 +110,13 @@ def handle_login(request, form):
 
 def verify_email_token(token):
     """Validate and consume verification token"""
+    if not is_db_token(token):
+        return _verify_signed_email_token(token)
+
     try:
-        verification_token = EmailVerificationToken.objects.get(token=token)
+        verification_token = EmailVerificationToken.objects.select_related(
+            "user"
+        ).get(token=token)
     except EmailVerificationToken.DoesNotExist:
         return None, "invalid"
 
@@ -82,11 +137,35 @@ def verify_email_token(token):
     return user, "success"
 
 
-def resend_verification(request, email):
-    """Resend email verification link"""
+def _verify_signed_email_token(token):
     try:
-        user = User.objects.get(email=email)
+        user = User.objects.get(pk=email_verification_token.user_pk(token))
     except User.DoesNotExist:
+        return None, "invalid"
+
+    status = email_verification_token.check_token(user, token)
+    if status != "success":
+        return None, status
+
+    if user.is_verified_email:  # type: ignore
+        return None, "used"
+
+    # The is_verified_email condition makes a concurrent second redemption a no-op
+    if not User.objects.filter(pk=user.pk, is_verified_email=False).update(
+        is_verified_email=True, is_active=True
+    ):
+        return None, "used"
+    invalidate_user(user.email)
+
+    user.is_verified_email = True
+    user.is_active = True
+    return user, "success"
+
+
+def resend_verification(request, form):
+    """Resend email verification link to the user validated by the form"""
+    user = form.get_user()
+    if user is None:
         return False
 
     return send_verification_email(request, user)
@@ -95,11 +174,10 @@ def resend_verification(request, email):
 # ---------------- PASSWORD RESET ----------------
 
 
-def request_password_reset(request, email):
-    """Send password reset email if user is verified"""
-    try:
-        user = User.objects.get(email=email)
-    except User.DoesNotExist:
+def request_password_reset(request, form):
+    """Send password reset email if the user validated by the form is verified"""
+    user = form.get_user()
+    if user is None:
         return None, "invalid"
 
     # If not verified and created more than 24 hours ago → delete
@@ -117,8 +195,13 @@ def request_password_reset(request, email):
 
 def confirm_password_reset(token, new_password):
     """Confirm password reset via token and set new password"""
+    if not is_db_token(token):
+        return _confirm_signed_password_reset(token, new_password)
+
     try:
-        reset_token = PasswordResetToken.objects.get(token=token)
+        reset_token = PasswordResetToken.objects.select_related("user").get(
+            token=token
+        )
     except PasswordResetToken.DoesNotExist:
         return None, "invalid"
 
@@ -136,3 +219,207 @@ def confirm_password_reset(token, new_password):
     reset_token.save()
 
     return user, "success"
+
+
+def _confirm_signed_password_reset(token, new_password):
+    try:
+        user = User.objects.get(pk=password_reset_token.user_pk(token))
+    except User.DoesNotExist:
+        return None, "invalid"
+
+    # A used token no longer matches the password hash, so it reads as used
+    status = password_reset_token.check_token(user, token)
+    if status != "success":
+        return None, status
+
+    old_password = user.password
+    user.set_password(new_password)
+    # Matching the old hash makes a concurrent second redemption a no-op
+    if not User.objects.filter(pk=user.pk, password=old_password).update(
+        password=user.password
+    ):
+        return None, "used"
+    invalidate_user(user.email)
+
+    return user, "success"
+
+
+# ---------------- ASYNC (ASGI) ----------------
+# Async counterparts of the services above for the async views. ORM access uses
+# Django's async API; password hashing is awaited on the hashing pool (or the
+# default executor when the pool is disabled) so PBKDF2 never blocks the loop.
+
+
+async def ahandle_signup(request, form):
+    """Async version of handle_signup"""
+    existing_user = await alookup_user_by_email(form.cleaned_data["email"])
+    outcome = _existing_signup(existing_user)
+    if outcome is None:
+        # form.save(commit=False) hashes the password, so keep it off the loop.
+        # sync_to_async (unlike loop.run_in_executor) carries the context
+        # variables, so the lookup memo and timed("hash") still apply.
+        new_user = await sync_to_async(form.save, thread_sensitive=False)(False)
+        outcome = await sync_to_async(_insert_user)(new_user, existing_user)
+    user, result = outcome
+
+    if result == "resend":
+        await asend_verification_email(request, user)
+        return "resend"
+    if result == "exists":
+        return "exists"
+
+    if await asend_verification_email(request, user):
+        return "success"
+    return "fail"
+
+
+async def ahandle_login(request, form):
+    """Async version of handle_login"""
+    email = form.cleaned_data["email"]
+    password = form.cleaned_data["password"]
+
+    user = await alookup_user_by_email(email)
+    if user is None:
+        return None, "invalid"
+
+    if not user.is_verified_email:  # type: ignore
+        return user, "unverified"
+
+    if not user.is_active:
+        return user, "inactive"
+
+    user = await aauthenticate(request, user=user, password=password)
+    if not user:
+        return None, "invalid"
+
+    return user, "success"
+
+
+async def averify_email_token(token):
+    """Async version of verify_email_token"""
+    if not is_db_token(token):
+        return await _averify_signed_email_token(token)
+
+    try:
+        verification_token = await EmailVerificationToken.objects.select_related(
+            "user"
+        ).aget(token=token)
+    except EmailVerificationToken.DoesNotExist:
+        return None, "invalid"
+
+    if verification_token.is_expired():
+        return None, "expired"
+
+    if verification_token.is_used:
+        return None, "used"
+
+    user = verification_token.user
+    user.is_verified_email = True
+    user.is_active = True
+    await user.asave()
+
+    verification_token.is_used = True
+    await verification_token.asave()
+
+    return user, "success"
+
+
+async def _averify_signed_email_token(token):
+    try:
+        user = await User.objects.aget(pk=email_verification_token.user_pk(token))
+    except User.DoesNotExist:
+        return None, "invalid"
+
+    status = email_verification_token.check_token(user, token)
+    if status != "success":
+        return None, status
+
+    if user.is_verified_email:  # type: ignore
+        return None, "used"
+
+    if not await User.objects.filter(pk=user.pk, is_verified_email=False).aupdate(
+        is_verified_email=True, is_active=True
+    ):
+        return None, "used"
+    await sync_to_async(invalidate_user)(user.email)
+
+    user.is_verified_email = True
+    user.is_active = True
+    return user, "success"
+
+
+async def aresend_verification(request, form):
+    """Async version of resend_verification"""
+    user = form.get_user()
+    if user is None:
+        return False
+
+    return await asend_verification_email(request, user)
+
+
+async def arequest_password_reset(request, form):
+    """Async version of request_password_reset"""
+    user = form.get_user()
+    if user is None:
+        return None, "invalid"
+
+    if not user.is_verified_email and user.created_at < timezone.now() - timedelta(hours=24):  # type: ignore
+        await user.adelete()
+        return None, "Your account exceed the time limit for verification. Please register again."
+
+    if not user.is_verified_email:  # type: ignore
+        return user, "Email not verified. Please verify it."
+
+    if await asend_password_reset_email(request, user):
+        return user, "success"
+    return None, "fail"
+
+
+async def aconfirm_password_reset(token, new_password):
+    """Async version of confirm_password_reset"""
+    if not is_db_token(token):
+        return await _aconfirm_signed_password_reset(token, new_password)
+
+    try:
+        reset_token = await PasswordResetToken.objects.select_related("user").aget(
+            token=token
+        )
+    except PasswordResetToken.DoesNotExist:
+        return None, "invalid"
+
+    if reset_token.is_expired():
+        return None, "expired"
+
+    if reset_token.is_used:
+        return None, "used"
+
+    user = reset_token.user
+    user.password = await amake_password(new_password)
+    user._password = new_password
+    await user.asave()
+
+    reset_token.is_used = True
+    await reset_token.asave()
+
+    return user, "success"
+
+
+async def _aconfirm_signed_password_reset(token, new_password):
+    try:
+        user = await User.objects.aget(pk=password_reset_token.user_pk(token))
+    except User.DoesNotExist:
+        return None, "invalid"
+
+    status = password_reset_token.check_token(user, token)
+    if status != "success":
+        return None, status
+
+    old_password = user.password
+    user.password = await amake_password(new_password)
+    if not await User.objects.filter(pk=user.pk, password=old_password).aupdate(
+        password=user.password
+    ):
+        return None, "used"
+    await sync_to_async(invalidate_user)(user.email)
+
+    return user, "success"
@@ -0,0 +1,123 @@
+"""
+Session engine that keeps anonymous sessions in a signed cookie and moves a
+session to the database once a user logs in.
+
+Anonymous auth pages then never touch django_session. Use it with
+SESSION_ENGINE = "frontend.sessions"; frontend.cached_sessions does the same
+with a cache in front of the database, which is only safe when
+SESSION_CACHE_ALIAS is shared by every worker (logging out must evict the
+session everywhere).
+"""
+
+from django.contrib.auth import SESSION_KEY
+from django.contrib.sessions.backends.db import SessionStore as DBStore
+from django.core import signing
+
+SALT = "frontend.sessions"
+
+
+def is_signed_key(session_key):
+    # Signed payloads always contain ":"; database keys are [a-z0-9] only
+    return bool(session_key) and ":" in session_key
+
+
+class HybridSessionMixin:
+    """Signed-cookie storage until login, then the database store it's mixed into"""
+
+    def _in_cookie(self):
+        return SESSION_KEY not in self._session
+
+    def _load_signed(self):
+        try:
+            return signing.loads(
+                self.session_key,
+                serializer=self.serializer,
+                max_age=self.get_session_cookie_age(),
+                salt=SALT,
+            )
+        except Exception:
+            # Bad signature, expired or garbled: start an empty session
+            self._session_key = None
+            return {}
+
+    def _save_signed(self):
+        self._session_key = signing.dumps(
+            self._session, compress=True, salt=SALT, serializer=self.serializer
+        )
+        self.modified = True
+
+    def load(self):
+        if is_signed_key(self.session_key):
+            return self._load_signed()
+        return super().load()
+
+    async def aload(self):
+        if is_signed_key(self.session_key):
+            return self._load_signed()
+        return await super().aload()
+
+    def save(self, must_create=False):
+        if self._in_cookie():
+            self._save_signed()
+            return
+        if is_signed_key(self.session_key):
+            # Logging in: give the session a fresh database key
+            self._session_key = None
+        super().save(must_create)
+
+    async def asave(self, must_create=False):
+        if self._in_cookie():
+            self._save_signed()
+            return
+        if is_signed_key(self.session_key):
+            self._session_key = None
+        await super().asave(must_create)
+
+    def exists(self, session_key):
+        if is_signed_key(session_key):
+            return False
+        return super().exists(session_key)
+
+    async def aexists(self, session_key):
+        if is_signed_key(session_key):
+            return False
+        return await super().aexists(session_key)
+
+    def delete(self, session_key=None):
+        if is_signed_key(session_key or self.session_key):
+            # Nothing is stored server-side; the cookie is rewritten on save
+            if session_key is None:
+                self._session_key = None
+                self._session_cache = {}
+                self.modified = True
+            return
+        super().delete(session_key)
+
+    async def adelete(self, session_key=None):
+        if is_signed_key(session_key or self.session_key):
+            if session_key is None:
+                self._session_key = None
+                self._session_cache = {}
+                self.modified = True
+            return
+        await super().adelete(session_key)
+
+    def cycle_key(self):
+        if not self._in_cookie():
+            return super().cycle_key()
+        # The signed key changes with the data, and login moves the session to
+        # a new random database key, so there is nothing to fixate on
+        self._session_cache = self._session
+        self._session_key = None
+        self.modified = True
+
+    async def acycle_key(self):
+        if not self._in_cookie():
+            return await super().acycle_key()
+        self._session_cache = await self._aget_session()
+        self._session_key = None
+        self.modified = True
+
+
+class SessionStore(HybridSessionMixin, DBStore):
+    pass
@@ -1,7 +1,4 @@
 document.addEventListener("DOMContentLoaded", () => {
-  console.log(window.innerWidth, 'x', window.innerHeight);
-console.log(screen.width, 'x', screen.height, ' devicePixelRatio=', window.devicePixelRatio);
-
   // -----------------------------
   // Helper: Change page title
   // -----------------------------
@@ -122,40 +119,18 @@ console.log(screen.width, 'x', screen.height, ' devicePixelRatio=', window.devic
   }
 
   // -----------------------------
-  // Dinosaur eye movement
+  // Dinosaur eye movement: only on devices with a mouse, loaded once the
+  // page is idle (see parallax.js)
   // -----------------------------
-  function setupEyeMovement() {
-    const rightEye = document.querySelector(".right-eye .pupil");
-
-    if (rightEye && window.matchMedia("(pointer: fine)").matches) {
-      let animationFrameId;
-
-      window.addEventListener("mousemove", (e) => {
-        if (animationFrameId) {
-          cancelAnimationFrame(animationFrameId);
-        }
-
-        animationFrameId = requestAnimationFrame(() => {
-          const eyeElement = document.querySelector(".right-eye");
-          if (!eyeElement) return;
-          
-          const eyeRect = eyeElement.getBoundingClientRect();
-          const centerX = eyeRect.left + eyeRect.width / 2;
-          const centerY = eyeRect.top + eyeRect.height / 2;
-          
-          const deltaX = e.clientX - centerX;
-          const deltaY = e.clientY - centerY;
-          const angle = Math.atan2(deltaY, deltaX);
-          
-          const maxDistanceX = 5;
-          const maxDistanceY = 5;
-          
-          const moveX = Math.cos(angle) * Math.min(maxDistanceX, Math.abs(deltaX) * 0.1);
-          const moveY = Math.sin(angle) * Math.min(maxDistanceY, Math.abs(deltaY) * 0.1);
-          
-          rightEye.style.transform = `translate3d(${moveX}px, ${moveY}px, 0)`;
-        });
-      });
+  function loadEyeMovement() {
+    if (!window.PARALLAX_URL || !window.matchMedia("(pointer: fine)").matches) {
+      return;
+    }
+    const load = () => import(window.PARALLAX_URL).then((m) => m.setupEyeMovement());
+    if ("requestIdleCallback" in window) {
+      requestIdleCallback(load, { timeout: 2000 });
+    } else {
+      setTimeout(load, 200);
     }
   }
 
@@ -184,6 +159,6 @@ console.log(screen.width, 'x', screen.height, ' devicePixelRatio=', window.devic
   setInitialTitle();
   setupPasswordToggles();
   setupFormToggling();
-  setupEyeMovement();
+  loadEyeMovement();
   setupAlertTimeout();
 });
\ No newline at end of file
@@ -0,0 +1,106 @@
+document.addEventListener("DOMContentLoaded",()=>{
+function setPageTitle(newTitle){
+document.title=newTitle;
+}
+function setupPasswordToggles(){
+const passwordToggles=[
+{iconSelector:".signup_section .toggle-password",inputId:"signup-password"},
+{iconSelector:".login_section .toggle-password",inputId:"login-password"},
+{iconSelector:".toggle-confirm-password",inputId:"confirm-password"}
+];
+passwordToggles.forEach(({iconSelector,inputId})=>{
+const icon=document.querySelector(iconSelector);
+const input=document.getElementById(inputId);
+if(icon&&input){
+icon.addEventListener("click",()=>{
+if(input.type==="password"){
+input.type="text";
+icon.src=window.VISIBLE_IMAGE_URL;
+icon.alt="hide password";
+}else{
+input.type="password";
+icon.src=window.HIDE_IMAGE_URL;
+icon.alt="show password";
+}
+});
+}
+});
+}
+function setupFormToggling(){
+const mainEl=document.querySelector("main");
+const dinoImg=document.querySelector(".dino_container .dino_img");
+const signupSection=document.querySelector(".signup_section");
+const loginSection=document.querySelector(".login_section");
+const toggleLogin=document.querySelector("#toggle-login");
+const toggleSignup=document.querySelector("#toggle-signup");
+if(toggleLogin){
+toggleLogin.addEventListener("click",(e)=>{
+e.preventDefault();
+if(mainEl)mainEl.classList.add("login-active");
+if(signupSection)signupSection.classList.add("hidden");
+if(loginSection)loginSection.classList.remove("hidden");
+setPageTitle("Login | Mobizilla");
+clearFormErrors();
+});
+}
+if(toggleSignup){
+toggleSignup.addEventListener("click",(e)=>{
+e.preventDefault();
+if(mainEl)mainEl.classList.remove("login-active");
+if(loginSection)loginSection.classList.add("hidden");
+if(signupSection)signupSection.classList.remove("hidden");
+if(dinoImg&&window.DINO_3D_URL){
+dinoImg.src=window.DINO_3D_URL;
+}
+setPageTitle("Sign Up | Mobizilla");
+clearFormErrors();
+});
+}
+}
+function clearFormErrors(){
+document.querySelectorAll('.error, .non-field-errors').forEach(error=>{
+error.style.display='none';
+});
+document.querySelectorAll('.form-field-error').forEach(field=>{
+field.classList.remove('form-field-error');
+});
+}
+function setInitialTitle(){
+const mainEl=document.querySelector("main");
+if(mainEl&&mainEl.classList.contains("login-active")){
+setPageTitle("Login | Mobizilla");
+}else{
+setPageTitle("Sign Up | Mobizilla");
+}
+}
+function loadEyeMovement(){
+if(!window.PARALLAX_URL||!window.matchMedia("(pointer: fine)").matches){
+return;
+}
+const load=()=>import(window.PARALLAX_URL).then((m)=>m.setupEyeMovement());
+if("requestIdleCallback" in window){
+requestIdleCallback(load,{timeout:2000});
+}else{
+setTimeout(load,200);
+}
+}
+function setupAlertTimeout(){
+document.querySelectorAll(".alert").forEach((alert)=>{
+alert.style.opacity="1";
+alert.style.transition="opacity 300ms ease-out";
+setTimeout(()=>{
+alert.style.opacity="0";
+setTimeout(()=>{
+if(alert.parentNode){
+alert.remove();
+}
+},300);
+},5000);
+});
+}
+setInitialTitle();
+setupPasswordToggles();
+setupFormToggling();
+loadEyeMovement();
+setupAlertTimeout();
+});
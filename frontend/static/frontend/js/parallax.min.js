@@ -0,0 +1,42 @@
+const MAX_DISTANCE=5;
+export function setupEyeMovement(){
+const eye=document.querySelector(".right-eye");
+const pupil=eye&&eye.querySelector(".pupil");
+if(!pupil)return;
+let center=null;
+let pointerX=0;
+let pointerY=0;
+let frameRequested=false;
+function measure(){
+const rect=eye.getBoundingClientRect();
+center={x:rect.left + rect.width / 2,y:rect.top + rect.height / 2};
+}
+function update(){
+frameRequested=false;
+if(!center)measure();
+const deltaX=pointerX - center.x;
+const deltaY=pointerY - center.y;
+const angle=Math.atan2(deltaY,deltaX);
+const moveX=Math.cos(angle)*Math.min(MAX_DISTANCE,Math.abs(deltaX)*0.1);
+const moveY=Math.sin(angle)*Math.min(MAX_DISTANCE,Math.abs(deltaY)*0.1);
+pupil.style.transform=`translate3d(${moveX}px, ${moveY}px, 0)`;
+}
+window.addEventListener(
+"pointermove",
+(e)=>{
+pointerX=e.clientX;
+pointerY=e.clientY;
+if(!frameRequested){
+frameRequested=true;
+requestAnimationFrame(update);
+}
+},
+{passive:true}
+);
+const invalidate=()=>{
+center=null;
+};
+window.addEventListener("resize",invalidate,{passive:true});
+window.addEventListener("scroll",invalidate,{passive:true});
+document.addEventListener("transitionend",invalidate);
+}
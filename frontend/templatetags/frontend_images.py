@@ -0,0 +1,51 @@
+from django import template
+from django.forms.utils import flatatt
+from django.templatetags.static import static
+from django.utils.html import format_html
+
+from frontend.images import get_variants
+
+register = template.Library()
+
+
+def _srcset(variants):
+    return ", ".join(f"{static(v['path'])} {v['width']}w" for v in variants)
+
+
+@register.simple_tag
+def picture(name, alt="", sizes="100vw", **attrs):
+    """
+    Render the static image `name` as a <picture> with WebP and PNG/JPEG
+    srcsets from `manage.py optimize_images`, so the browser fetches the
+    smallest variant that fits `sizes`. Images without WebP variants get an
+    <img> with just the PNG/JPEG srcset, and images without variants a plain
+    <img>.
+    """
+    entry = get_variants(name)
+    if entry is None:
+        return format_html(
+            '<img src="{}" alt="{}"{}>', static(name), alt, flatatt(attrs)
+        )
+
+    webp = [v for v in entry["variants"] if v["format"] == "webp"]
+    fallback = [v for v in entry["variants"] if v["format"] == entry["fallback"]]
+    if not webp:
+        return format_html(
+            '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}>',
+            static(fallback[-1]["path"]),
+            _srcset(fallback),
+            sizes,
+            alt,
+            flatatt(attrs),
+        )
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}" sizes="{}">'
+        '<img src="{}" srcset="{}" sizes="{}" alt="{}"{}></picture>',
+        _srcset(webp),
+        sizes,
+        static(fallback[-1]["path"]),
+        _srcset(fallback),
+        sizes,
+        alt,
+        flatatt(attrs),
+    )
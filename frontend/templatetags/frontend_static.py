@@ -0,0 +1,45 @@
+import re
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from django import template
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import ManifestFilesMixin, staticfiles_storage
+from django.templatetags.static import static
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+# Relative url() references, which must be resolved against the file's own URL
+# once its content is moved into the page
+RELATIVE_URL = re.compile(r"""url\((["']?)(?!data:|[a-z]+://|/|#)([^"')]+)\1\)""")
+
+
+def _read(name):
+    if isinstance(staticfiles_storage, ManifestFilesMixin):
+        # The stored copy, whose url()s point at hashed names
+        with staticfiles_storage.open(staticfiles_storage.stored_name(name)) as fh:
+            content = fh.read().decode()
+    else:
+        with open(finders.find(name)) as fh:
+            content = fh.read()
+
+    base = static(name)
+    content = RELATIVE_URL.sub(
+        lambda m: f"url({m[1]}{urljoin(base, m[2])}{m[1]})", content
+    )
+    # Keep the content from closing the surrounding <style>/<script> tag
+    return content.replace("</", "<\\/").strip()
+
+
+_read_cached = lru_cache(maxsize=None)(_read)
+
+
+@register.simple_tag
+def inline_static(name):
+    """
+    Output the content of the static file `name`, e.g. critical CSS inside a
+    <style> tag. Read once per process outside DEBUG.
+    """
+    return mark_safe(_read(name) if settings.DEBUG else _read_cached(name))
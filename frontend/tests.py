@@ -1,3 +1,1175 @@
-from django.test import TestCase
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import SESSION_KEY, hashers, login
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend as LocMemEmailBackend
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import Http404, HttpResponse
+from django.template import Context, Template
+from django.template.loader import render_to_string
+from django.test import (Client, RequestFactory, SimpleTestCase, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path
+from django.utils import timezone
+from django.utils.http import base36_to_int, int_to_base36
+
+from frontend import auth_urls, metrics, ratelimit, views
+from frontend.checks import check_static_references
+from frontend.critical_css import index_page, parse, render, split
+from frontend.forms import LoginForm, SignUpForm
+from frontend.hashing import HashingPool, HashingPoolBusy
+from frontend.js_minify import minify
+from frontend.mail_render import EmailRenderer
+from frontend.mailer import ConnectionPool
+from frontend.middleware import PrimaryPinningMiddleware
+from frontend.models import (EmailVerificationToken, OutboundEmail,
+                             PasswordResetToken, User)
+from frontend.outbox import claim_batch, deliver_batch
+from frontend.routers import PrimaryReplicaRouter, unpin
+from frontend.services import (_signup_user, aconfirm_password_reset,
+                               confirm_password_reset, handle_login,
+                               verify_email_token)
+from frontend.sessions import SessionStore as HybridSessionStore
+from frontend.sessions import is_signed_key
+from frontend.tokens import (email_verification_token, is_db_token,
+                             password_reset_token)
+
+# The async views under /async/, for AsyncViewQueryCountTests
+async_patterns = [
+    path("auth/", views.aauth_view),
+    path("verify/<str:token>/", views.averify_email_view),
+    path("verification-sent/", views.verification_sent_view),
+    path(
+        "resend-verification/",
+        views.aresend_verification_view,
+        name="resend_verification",
+    ),
+    path("password-reset/", views.apassword_reset_request_view),
+    path("password-reset/sent/", views.password_reset_sent_view),
+    path("password-reset/<str:token>/", views.apassword_reset_confirm_view),
+    path("", views.dashboard_view),
+    path("profile/", views.profile_view),
+]
+
+urlpatterns = [
+    path("async/", include((async_patterns, "async"))),
+    *auth_urls.urlpatterns,
+]
+
+# Stand-ins for page templates that aren't in the tree yet
+PAGE = "{% for message in messages %}{{ message }}{% endfor %}{{ form }}"
+STUB_TEMPLATES = {
+    "frontend/dashboard.html": "{{ user.name }}",
+    "frontend/profile.html": "{{ profile_form }}{{ password_form }}",
+    "frontend/emails/verification_sent.html": PAGE,
+    "frontend/emails/resend_verification.html": PAGE,
+    "frontend/emails/password_reset_request.html": PAGE,
+    "frontend/emails/password_reset_sent.html": PAGE,
+    "frontend/emails/password_reset_confirm.html": PAGE,
+}
+
+FAST_AUTH = {
+    "PASSWORD_HASHERS": ["django.contrib.auth.hashers.MD5PasswordHasher"],
+    "PASSWORD_HASHING_WORKERS": 0,
+}
+
+
+@override_settings(**FAST_AUTH)
+class LoginQueryCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            email="ann@example.com", name="Ann", password="s3cret-pass"
+        )
+        User.objects.filter(pk=self.user.pk).update(is_verified_email=True)
+
+    def test_successful_login_query_count(self):
+        request = RequestFactory().post("/auth/")
+        request.session = SessionStore()
+        form = LoginForm({"email": "ann@example.com", "password": "s3cret-pass"})
+        self.assertTrue(form.is_valid())
+
+        # 1 user SELECT; the password is checked on that same instance
+        with self.assertNumQueries(1):
+            user, status = handle_login(request, form)
+        self.assertEqual(status, "success")
+
+        # Session key check + INSERT (in a savepoint), then one last_login UPDATE
+        with self.assertNumQueries(5):
+            login(request, user)
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+
+@override_settings(**FAST_AUTH)
+class SignupOutcomeTests(TestCase):
+    password = "Xyz!23456abc"
+
+    def form(self, email="cat@example.com"):
+        form = SignUpForm(
+            {
+                "email": email,
+                "full_name": "Cat",
+                "password1": self.password,
+                "password2": self.password,
+                "agree_terms": "on",
+            }
+        )
+        self.assertTrue(form.is_valid(), form.errors)
+        return form
+
+    def signup(self, form):
+        return _signup_user(form)
+
+    def test_new_email_is_created(self):
+        user, outcome = self.signup(self.form())
+        self.assertEqual(outcome, "success")
+        self.assertFalse(User.objects.get(pk=user.pk).is_active)
+
+    def test_verified_email_exists(self):
+        User.objects.create_user(email="cat@example.com", name="Cat")
+        User.objects.update(is_verified_email=True)
+        self.assertEqual(self.signup(self.form("CAT@example.com")), (None, "exists"))
+
+    def test_recent_unverified_user_gets_resend(self):
+        existing = User.objects.create_user(email="cat@example.com", name="Cat")
+        self.assertEqual(self.signup(self.form()), (existing, "resend"))
+
+    def test_taken_email_is_not_hashed(self):
+        User.objects.create_user(email="cat@example.com", name="Cat")
+        form = self.form()
+        with mock.patch.object(SignUpForm, "save") as save:
+            self.assertEqual(self.signup(form)[1], "resend")
+            User.objects.update(is_verified_email=True)
+            self.assertEqual(self.signup(self.form()), (None, "exists"))
+        save.assert_not_called()
+
+    def test_stale_unverified_user_is_replaced(self):
+        stale = User.objects.create_user(email="cat@example.com", name="Cat")
+        User.objects.update(created_at=timezone.now() - timedelta(days=2))
+
+        user, outcome = self.signup(self.form())
+        self.assertEqual(outcome, "success")
+        self.assertNotEqual(user.pk, stale.pk)
+        self.assertFalse(User.objects.filter(pk=stale.pk).exists())
+
+    def test_concurrent_signup_reported_as_exists(self):
+        form = self.form()
+        # Another request inserts the same address after our lookup
+        User.objects.create_user(email="Cat@example.com", name="Cat")
+        with mock.patch.object(QuerySet, "first", return_value=None):
+            self.assertEqual(self.signup(form), (None, "exists"))
+
+    def test_overlong_email_rejected_by_form(self):
+        form = SignUpForm({"email": f"{'a' * 250}@example.com"})
+        self.assertIn("email", form.errors)
+
+
+@override_settings(**FAST_AUTH)
+class TokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ann@example.com", name="Ann", password="s3cret-pass"
+        )
+        self.other = User.objects.create_user(email="bob@example.com", name="Bob")
+
+    def later(self, seconds):
+        return mock.patch(
+            "frontend.tokens.time.time", return_value=time.time() + seconds
+        )
+
+    def test_issued_token_checks(self):
+        token = password_reset_token.make_token(self.user)
+        self.assertFalse(is_db_token(token))
+        self.assertEqual(password_reset_token.user_pk(token), self.user.pk)
+        self.assertEqual(password_reset_token.check_token(self.user, token), "success")
+
+    def test_expired_token(self):
+        token = email_verification_token.make_token(self.user)
+        with self.later(24 * 60 * 60 + 1):
+            self.assertEqual(
+                email_verification_token.check_token(self.user, token), "expired"
+            )
+            self.assertEqual(verify_email_token(token), (None, "expired"))
+
+    def test_tampered_signature_is_invalid(self):
+        token = password_reset_token.make_token(self.user)
+        pk, timestamp, signatures = token.split("-")
+        flipped = ("0" if signatures[0] != "0" else "1") + signatures[1:]
+        later = int_to_base36(base36_to_int(timestamp) + 60)
+        for tampered in (f"{pk}-{timestamp}-{flipped}", f"{pk}-{later}-{signatures}"):
+            self.assertEqual(
+                password_reset_token.check_token(self.user, tampered), "invalid"
+            )
+        self.assertEqual(confirm_password_reset("x-y-z", "n3w-pass"), (None, "invalid"))
+
+    def test_token_for_another_user_is_invalid(self):
+        token = email_verification_token.make_token(self.user)
+        self.assertEqual(
+            email_verification_token.check_token(self.other, token), "invalid"
+        )
+        # A token signed by another generator doesn't verify either
+        token = password_reset_token.make_token(self.user)
+        self.assertEqual(
+            email_verification_token.check_token(self.user, token), "invalid"
+        )
+
+    def test_token_for_deleted_user_is_invalid(self):
+        token = email_verification_token.make_token(self.other)
+        self.other.delete()
+        self.assertEqual(verify_email_token(token), (None, "invalid"))
+
+    def test_signed_verification_is_single_use(self):
+        token = email_verification_token.make_token(self.user)
+        user, status = verify_email_token(token)
+        self.assertEqual(status, "success")
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_verified_email)
+        self.assertEqual(verify_email_token(token), (None, "used"))
+
+    def test_signed_reset_is_single_use(self):
+        token = password_reset_token.make_token(self.user)
+        user, status = confirm_password_reset(token, "n3w-pass")
+        self.assertEqual(status, "success")
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password("n3w-pass"))
+        self.assertEqual(confirm_password_reset(token, "other-pass"), (None, "used"))
+        self.assertTrue(User.objects.get(pk=self.user.pk).check_password("n3w-pass"))
+
+    def test_async_signed_reset_is_single_use(self):
+        token = password_reset_token.make_token(self.user)
+        confirm = async_to_sync(aconfirm_password_reset)
+        self.assertEqual(confirm(token, "n3w-pass")[1], "success")
+        self.assertEqual(confirm(token, "other-pass"), (None, "used"))
+
+    def test_database_and_signed_links_both_accepted(self):
+        signed = email_verification_token.make_token(self.user)
+        stored = EmailVerificationToken.objects.create(user=self.other)
+        self.assertTrue(is_db_token(stored.token))
+        self.assertEqual(verify_email_token(str(stored.token))[1], "success")
+        self.assertEqual(verify_email_token(signed)[1], "success")
+
+        signed = password_reset_token.make_token(self.user)
+        stored = PasswordResetToken.objects.create(user=self.other)
+        token = str(stored.token)
+        self.assertEqual(confirm_password_reset(token, "n3w-pass")[1], "success")
+        self.assertEqual(confirm_password_reset(signed, "n3w-pass")[1], "success")
+        self.assertEqual(confirm_password_reset(token, "n3w-pass"), (None, "used"))
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    TEMPLATES=[
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "DIRS": [],
+            "OPTIONS": {
+                "context_processors": [
+                    "django.template.context_processors.request",
+                    "django.contrib.auth.context_processors.auth",
+                    "django.contrib.messages.context_processors.messages",
+                ],
+                "loaders": [
+                    ("django.template.loaders.locmem.Loader", STUB_TEMPLATES),
+                    "django.template.loaders.app_directories.Loader",
+                ],
+            },
+        }
+    ],
+    **FAST_AUTH,
+)
+class ViewQueryCountTests(TestCase):
+    """
+    Lock in the number of queries each view makes. Requests that take an
+    email look the user up exactly once, in form validation.
+    """
+
+    password = "s3cret-pass"
+
+    def setUp(self):
+        cache.clear()
+        self.verified = User.objects.create_user(
+            email="ann@example.com", name="Ann", password=self.password
+        )
+        self.unverified = User.objects.create_user(
+            email="bob@example.com", name="Bob", password=self.password
+        )
+        User.objects.filter(pk=self.verified.pk).update(is_verified_email=True)
+        self.verified.refresh_from_db()
+
+    # AsyncViewQueryCountTests runs every test again against the async views
+    namespace = "frontend"
+
+    def get(self, path):
+        return self.client.get(path)
+
+    def post(self, path, data):
+        return self.client.post(path, data)
+
+    def force_login(self, user):
+        self.client.force_login(user)
+
+    def test_auth_get(self):
+        with self.assertNumQueries(0):
+            response = self.get("/auth/")
+        self.assertEqual(response.status_code, 200)
+
+    def test_auth_get_served_from_page_cache(self):
+        if self.namespace == "async":
+            self.skipTest("Uses its own Client; the page cache is the same decorator")
+        client = Client(enforce_csrf_checks=True)
+        client.get("/auth/")
+        client.cookies.clear()
+
+        response = client.get("/auth/")
+        self.assertNotContains(response, "__csrf_token__")
+        # The cached page carries a token that matches the new visitor's cookie
+        token = re.search(
+            r'name="csrfmiddlewaretoken" value="([^"]+)"', response.content.decode()
+        )[1]
+        with self.assertNumQueries(1):
+            response = client.post(
+                "/auth/",
+                {
+                    "login_form": "1",
+                    "email": "nobody@example.com",
+                    "password": "x",
+                    "csrfmiddlewaretoken": token,
+                },
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_page_cache_skipped_with_pending_messages(self):
+        self.get("/verification-sent/")
+        self.post("/resend-verification/", {"email": "bob@example.com"})
+
+        response = self.get("/verification-sent/")
+        self.assertContains(response, "Verification email sent.")
+
+    def test_auth_login(self):
+        # User SELECT, last_login UPDATE, then the session moves from the
+        # signed cookie to the database: key check + INSERT in a savepoint
+        with self.assertNumQueries(6):
+            response = self.post(
+                "/auth/",
+                {
+                    "login_form": "1",
+                    "email": "ann@example.com",
+                    "password": self.password,
+                },
+            )
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+
+    def test_login_sees_changes_made_by_other_workers(self):
+        credentials = {
+            "login_form": "1",
+            "email": "bob@example.com",
+            "password": self.password,
+        }
+        response = self.post("/auth/", credentials)
+        self.assertContains(response, "Please verify your email first.")
+
+        # Verified elsewhere, so no post_save signal fires in this process
+        User.objects.filter(pk=self.unverified.pk).update(
+            is_verified_email=True, is_active=True
+        )
+        response = self.post("/auth/", credentials)
+        self.assertRedirects(response, "/", fetch_redirect_response=False)
+
+    def test_auth_signup(self):
+        # Email SELECT + user INSERT in a savepoint (4), then the
+        # token DELETE/INSERT and the outbox INSERT
+        with self.assertNumQueries(7):
+            response = self.post(
+                "/auth/",
+                {
+                    "signup_form": "1",
+                    "email": "cat@example.com",
+                    "full_name": "Cat",
+                    "password1": "Xyz!23456abc",
+                    "password2": "Xyz!23456abc",
+                    "agree_terms": "on",
+                },
+            )
+        self.assertRedirects(
+            response, "/verification-sent/", fetch_redirect_response=False
+        )
+
+    def test_verify_email(self):
+        token = EmailVerificationToken.objects.create(user=self.unverified)
+        # Token + user SELECT, user + token UPDATEs, welcome outbox INSERT
+        with self.assertNumQueries(4):
+            response = self.get(f"/verify/{token.token}/")
+        self.assertRedirects(response, "/auth/", fetch_redirect_response=False)
+
+    def test_verification_sent(self):
+        with self.assertNumQueries(0):
+            self.get("/verification-sent/")
+
+    def test_resend_verification(self):
+        # One user SELECT, token DELETE/INSERT, outbox INSERT
+        with self.assertNumQueries(4):
+            response = self.post(
+                "/resend-verification/", {"email": "bob@example.com"}
+            )
+        self.assertRedirects(
+            response, "/verification-sent/", fetch_redirect_response=False
+        )
+
+    def test_repeat_resend_inside_cooldown_reuses_token(self):
+        self.post("/resend-verification/", {"email": "bob@example.com"})
+        token = EmailVerificationToken.objects.get(user=self.unverified)
+
+        # Just the user SELECT; no token churn and no second email
+        with self.assertNumQueries(1):
+            response = self.post(
+                "/resend-verification/", {"email": "bob@example.com"}
+            )
+        self.assertRedirects(
+            response, "/verification-sent/", fetch_redirect_response=False
+        )
+        self.assertEqual(
+            EmailVerificationToken.objects.get(user=self.unverified), token
+        )
+        self.assertEqual(OutboundEmail.objects.count(), 1)
+
+    def test_password_reset_request(self):
+        # One user SELECT, token DELETE/INSERT, outbox INSERT
+        with self.assertNumQueries(4):
+            response = self.post(
+                "/password-reset/", {"email": "ann@example.com"}
+            )
+        self.assertRedirects(
+            response, "/password-reset/sent/", fetch_redirect_response=False
+        )
+
+    @override_settings(RATE_LIMITS={"password_reset": {"email": "1/h"}})
+    def test_rate_limited_post_rejected_before_any_query(self):
+        self.post("/password-reset/", {"email": "ann@example.com"})
+        with self.assertNumQueries(0):
+            response = self.post(
+                "/password-reset/", {"email": " ANN@example.com"}
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(0 < int(response["Retry-After"]) <= 3600)
+
+        # Other addresses have their own bucket
+        response = self.post("/password-reset/", {"email": "bob@example.com"})
+        self.assertNotEqual(response.status_code, 429)
+
+    def test_password_reset_sent(self):
+        with self.assertNumQueries(0):
+            self.get("/password-reset/sent/")
+
+    def test_password_reset_confirm(self):
+        token = PasswordResetToken.objects.create(user=self.verified)
+        # Token + user SELECT, user + token UPDATEs
+        with self.assertNumQueries(3):
+            response = self.post(
+                f"/password-reset/{token.token}/",
+                {"password1": "n3w-password", "password2": "n3w-password"},
+            )
+        self.assertRedirects(response, "/auth/", fetch_redirect_response=False)
+
+    @override_settings(
+        INSTRUMENTATION_ENABLED=True, INSTRUMENTATION_SLOW_REQUEST_MS=0
+    )
+    def test_instrumentation(self):
+        metrics.registry.reset()
+        with self.assertLogs("frontend.middleware", "WARNING") as logs:
+            response = self.post(
+                "/resend-verification/", {"email": "bob@example.com"}
+            )
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="4 queries", template;dur=[\d.]+, '
+            r"hash;dur=[\d.]+, email;dur=[\d.]+, total;dur=[\d.]+$",
+        )
+        self.assertIn("INSERT INTO", logs.output[0])
+
+        request = RequestFactory().get("/metrics/", REMOTE_ADDR="127.0.0.1")
+        body = views.metrics_view(request).content.decode()
+        self.assertIn(
+            f'frontend_requests_total{{view="{self.namespace}:resend_verification",'
+            'status="302"} 1',
+            body,
+        )
+        self.assertIn(
+            f'frontend_db_queries_total{{view="{self.namespace}:resend_verification"}}'
+            " 4",
+            body,
+        )
+
+        # A forged forwarded address doesn't get past the allow-list
+        request = RequestFactory().get(
+            "/metrics/", REMOTE_ADDR="203.0.113.5", HTTP_X_FORWARDED_FOR="127.0.0.1"
+        )
+        with self.assertRaises(Http404):
+            views.metrics_view(request)
+
+    def test_saturated_hashing_pool_answers_503(self):
+        busy_pool = mock.Mock(submit=mock.Mock(side_effect=HashingPoolBusy))
+        with mock.patch("frontend.hashing.get_hashing_pool", return_value=busy_pool):
+            response = self.post(
+                "/auth/",
+                {
+                    "login_form": "1",
+                    "email": "ann@example.com",
+                    "password": self.password,
+                },
+            )
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "1")
+
+    def test_dashboard(self):
+        self.force_login(self.verified)
+        # Session SELECT, then User SELECT
+        with self.assertNumQueries(2):
+            self.get("/")
+
+    def test_profile(self):
+        self.force_login(self.verified)
+        # Session SELECT, then User SELECT
+        with self.assertNumQueries(2):
+            self.get("/profile/")
+
+
+class AsyncViewQueryCountTests(ViewQueryCountTests):
+    """The same requests through AsyncClient and the async views"""
+
+    namespace = "async"
+
+    def get(self, path):
+        return async_to_sync(self.async_client.get)(f"/async{path}")
+
+    def post(self, path, data):
+        return async_to_sync(self.async_client.post)(f"/async{path}", data)
+
+    def force_login(self, user):
+        self.async_client.force_login(user)
+
+
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(RATE_LIMITS={"login": {"ip": "5/h"}})
+    def test_parallel_requests_cannot_overshoot(self):
+        request = RequestFactory().post("/auth/", REMOTE_ADDR="10.0.0.1")
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(
+                executor.map(lambda _: ratelimit.check(request, "login"), range(20))
+            )
+        self.assertEqual(results.count(0), 5)
+
+    @override_settings(
+        RATE_LIMITS={"login": {"ip": "1/h"}},
+        RATE_LIMIT_CLIENT_IP_HEADER="HTTP_X_FORWARDED_FOR",
+    )
+    def test_client_ip_is_the_last_forwarded_hop(self):
+        factory = RequestFactory()
+        # Same proxy address; only the hop the proxy appended counts
+        for forwarded in ("1.1.1.1, 203.0.113.5", "9.9.9.9, 203.0.113.6"):
+            request = factory.post(
+                "/auth/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR=forwarded
+            )
+            self.assertEqual(ratelimit.check(request, "login"), 0)
+        request = factory.post(
+            "/auth/", REMOTE_ADDR="10.0.0.1", HTTP_X_FORWARDED_FOR="203.0.113.5"
+        )
+        self.assertGreater(ratelimit.check(request, "login"), 0)
+
+
+class HashingPoolTests(SimpleTestCase):
+    def test_submissions_over_max_pending_are_rejected(self):
+        pool = HashingPool(workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        running = pool.submit(time.sleep, 0.2)
+        with self.assertRaises(HashingPoolBusy):
+            pool.submit(time.sleep, 0)
+        running.result()
+
+        # The slot is free again once the job is done
+        pool.submit(time.sleep, 0).result()
+        stats = pool.stats()
+        self.assertEqual((stats["completed"], stats["rejected"]), (2, 1))
+        self.assertGreater(stats["max_latency_ms"], 0)
+
+        with mock.patch("frontend.hashing.get_hashing_pool", return_value=pool):
+            body = metrics.registry.render()
+        self.assertIn("frontend_hashing_pool_rejected_total 1", body)
+        self.assertIn("frontend_hashing_pool_max_latency_seconds 0.", body)
+
+
+    def test_workers_hash_in_a_forkserver_process(self):
+        pool = HashingPool(workers=1, max_pending=1)
+        self.addCleanup(pool.shutdown)
+        encoded = pool.submit(hashers.make_password, "hunter22").result()
+        self.assertEqual(pool._executor._mp_context.get_start_method(), "forkserver")
+        self.assertTrue(hashers.check_password("hunter22", encoded))
+
+@override_settings(
+    TEMPLATES=[
+        {
+            "BACKEND": "django.template.backends.django.DjangoTemplates",
+            "OPTIONS": {
+                "loaders": [
+                    (
+                        "django.template.loaders.locmem.Loader",
+                        {
+                            "mail/hello.html": (
+                                "<p>Hi {{ user.name }} ({{ site_name }})</p>"
+                                '<a href="{{ link }}">{{ user.email }}</a>'
+                            ),
+                            "mail/hello.txt": "Hi {{ user.name }}: {{ link }}",
+                            "mail/bare.html": "<p>Hi {{ user.name }}</p>",
+                        },
+                    ),
+                ],
+            },
+        }
+    ]
+)
+class EmailRendererTests(SimpleTestCase):
+    def setUp(self):
+        self.renderer = EmailRenderer()
+        self.request = RequestFactory().get("/")
+        self.user = SimpleNamespace(name="Ann <B&B>", email="ann@example.com")
+
+    def test_values_are_escaped_in_html_only(self):
+        site, text, html = self.renderer.render(
+            "mail/hello", self.request, self.user, link="/go/?a=1&b=2"
+        )
+        self.assertEqual(site.domain, "testserver")
+        self.assertEqual(text, "Hi Ann <B&B>: /go/?a=1&b=2")
+        self.assertEqual(
+            html,
+            "<p>Hi Ann &lt;B&amp;B&gt; (testserver)</p>"
+            '<a href="/go/?a=1&amp;b=2">ann@example.com</a>',
+        )
+
+    def test_skeleton_is_rendered_once(self):
+        self.renderer.render("mail/hello", self.request, self.user, link="/a/")
+        [(html, text)] = self.renderer._skeletons.values()
+        self.assertIn("\x1fuser.name\x1f", html)
+        self.assertEqual(text, "Hi \x1fuser.name\x1f: \x1flink\x1f")
+
+        bob = SimpleNamespace(name="Bob", email="bob@example.com")
+        with mock.patch.object(self.renderer, "_template") as template:
+            _, text, html = self.renderer.render(
+                "mail/hello", self.request, bob, link="/b/"
+            )
+        template.assert_not_called()
+        self.assertEqual(text, "Hi Bob: /b/")
+        self.assertIn('<a href="/b/">bob@example.com</a>', html)
+
+    def test_text_falls_back_to_the_stripped_html(self):
+        _, text, html = self.renderer.render("mail/bare", self.request, self.user)
+        self.assertEqual(text, "Hi Ann <B&B>")
+        self.assertEqual(html, "<p>Hi Ann &lt;B&amp;B&gt;</p>")
+
+
+class OutboxTests(TestCase):
+    def setUp(self):
+        self.pool = ConnectionPool(size=1)
+        self.addCleanup(self.pool.close_all)
+        patcher = mock.patch(
+            "frontend.outbox.get_connection_pool", return_value=self.pool
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def queue(self, count):
+        return [
+            OutboundEmail.objects.create(
+                subject="Hi",
+                body="Hello",
+                from_email="noreply@example.com",
+                to_email=f"user{i}@example.com",
+            ).pk
+            for i in range(count)
+        ]
+
+    def claim(self, count):
+        self.queue(count)
+        return claim_batch(count, lease_seconds=300, max_attempts=5)
+
+    def expire_leases(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+    def failing_send(self):
+        return mock.patch.object(
+            LocMemEmailBackend, "send_messages", side_effect=OSError("Refused")
+        )
+
+    def test_claimed_emails_are_not_claimed_again(self):
+        pks = self.claim(2)
+        OutboundEmail.objects.create(
+            subject="Later",
+            body="Hello",
+            from_email="noreply@example.com",
+            to_email="later@example.com",
+            next_attempt_at=timezone.now() + timedelta(minutes=5),
+        )
+        self.assertEqual(len(pks), 2)
+        self.assertEqual(claim_batch(10, 300, max_attempts=5), [])
+        self.assertEqual(
+            OutboundEmail.objects.filter(status=OutboundEmail.Status.SENDING).count(),
+            2,
+        )
+
+    def test_delivered_email_is_marked_sent(self):
+        [pk] = self.claim(1)
+        self.assertEqual(deliver_batch([pk], 5, 30), 1)
+        email = OutboundEmail.objects.get(pk=pk)
+        self.assertEqual(email.status, OutboundEmail.Status.SENT)
+        self.assertEqual(email.attempts, 1)
+        self.assertIsNotNone(email.sent_at)
+
+    def test_failed_send_is_retried_with_backoff(self):
+        [pk] = self.claim(1)
+        for attempt, delay in ((1, 30), (2, 60)):
+            started = timezone.now()
+            with self.failing_send():
+                self.assertEqual(deliver_batch([pk], 5, 30), 0)
+            email = OutboundEmail.objects.get(pk=pk)
+            self.assertEqual(email.status, OutboundEmail.Status.PENDING)
+            self.assertEqual(email.attempts, attempt)
+            self.assertEqual(email.last_error, "Refused")
+            self.assertGreaterEqual(
+                email.next_attempt_at, started + timedelta(seconds=delay)
+            )
+            self.assertLess(
+                email.next_attempt_at, timezone.now() + timedelta(seconds=delay + 1)
+            )
+
+            # Not due before the backoff ends
+            self.assertEqual(claim_batch(1, 300, max_attempts=5), [])
+            self.expire_leases()
+            self.assertEqual(claim_batch(1, 300, max_attempts=5), [pk])
+
+    def test_last_failed_attempt_marks_email_failed(self):
+        [pk] = self.claim(1)
+        with self.failing_send():
+            deliver_batch([pk], 2, 30)
+            self.expire_leases()
+            deliver_batch(claim_batch(1, 300, max_attempts=2), 2, 30)
+
+        email = OutboundEmail.objects.get(pk=pk)
+        self.assertEqual(email.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(email.attempts, 2)
+        self.expire_leases()
+        self.assertEqual(claim_batch(1, 300, max_attempts=2), [])
+
+    def test_purge_deletes_old_sent_emails(self):
+        old, recent, failed = self.queue(3)
+        long_ago = timezone.now() - timedelta(days=8)
+        OutboundEmail.objects.filter(pk__in=[old, recent]).update(
+            status=OutboundEmail.Status.SENT, sent_at=timezone.now()
+        )
+        OutboundEmail.objects.filter(pk=old).update(sent_at=long_ago)
+        OutboundEmail.objects.filter(pk=failed).update(
+            status=OutboundEmail.Status.FAILED, next_attempt_at=long_ago
+        )
+
+        call_command("purge_auth_data", stdout=StringIO())
+        self.assertCountEqual(
+            OutboundEmail.objects.values_list("pk", flat=True), [recent, failed]
+        )
+
+    def test_batch_skips_emails_that_cannot_be_loaded(self):
+        gone, kept = self.claim(2)
+        OutboundEmail.objects.filter(pk=gone).delete()
+
+        with self.assertLogs("frontend.outbox", "ERROR") as logs:
+            sent = deliver_batch([gone, kept], max_attempts=5, backoff_seconds=30)
+
+        self.assertEqual(sent, 1)
+        self.assertIn(f"Could not deliver email {gone}", logs.output[0])
+        self.assertEqual(
+            OutboundEmail.objects.get(pk=kept).status, OutboundEmail.Status.SENT
+        )
+
+    def test_expired_lease_counts_as_an_attempt(self):
+        [pk] = self.claim(1)
+        # The worker died without recording a result
+        for attempt in range(2, 6):
+            self.expire_leases()
+            self.assertEqual(claim_batch(1, 300, max_attempts=5), [pk])
+            self.assertEqual(OutboundEmail.objects.get(pk=pk).attempts, attempt)
+
+        self.expire_leases()
+        self.assertEqual(claim_batch(1, 300, max_attempts=5), [])
+        email = OutboundEmail.objects.get(pk=pk)
+        self.assertEqual(email.status, OutboundEmail.Status.FAILED)
+        self.assertEqual(email.attempts, 5)
+
+    def test_failed_send_gets_a_fresh_connection(self):
+        connections = []
+
+        def send_messages(backend, messages):
+            connections.append(backend)
+            if len(connections) == 1:
+                raise OSError("Connection reset by peer")
+            return len(messages)
+
+        with mock.patch.object(
+            LocMemEmailBackend,
+            "send_messages",
+            autospec=True,
+            side_effect=send_messages,
+        ):
+            sent = deliver_batch(self.claim(3), max_attempts=5, backoff_seconds=30)
+
+        self.assertEqual(sent, 2)
+        self.assertIsNot(connections[1], connections[0])
+        self.assertIs(connections[2], connections[1])
+
+
+class SQLitePragmaTests(SimpleTestCase):
+    def pragmas(self, *names):
+        """Open a new connection to a scratch file and read back `names`"""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        default = connections["default"]
+        connection = default.__class__(
+            {**default.settings_dict, "NAME": str(Path(tmp.name) / "db.sqlite3")},
+            alias="pragmas",
+        )
+        self.addCleanup(connection.close)
+        with connection.cursor() as cursor:
+            return [cursor.execute(f"PRAGMA {name}").fetchone()[0] for name in names]
+
+    def test_new_connections_get_the_pragmas(self):
+        self.assertEqual(
+            self.pragmas("journal_mode", "synchronous", "busy_timeout"),
+            ["wal", 1, 5000],  # synchronous=1 is NORMAL
+        )
+
+    def test_empty_pragmas_leave_sqlite_defaults(self):
+        with override_settings(SQLITE_PRAGMAS={}):
+            self.assertEqual(self.pragmas("journal_mode"), ["delete"])
+
+
+class PurgeAuthDataTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(
+            email="ann@example.com", name="Ann", is_verified_email=True
+        )
+
+    def purge(self, *args):
+        out = StringIO()
+        call_command("purge_auth_data", *args, stdout=out)
+        return out.getvalue()
+
+    def tokens(self, model, count, **fields):
+        return [
+            model.objects.create(user=self.user, **fields).pk for _ in range(count)
+        ]
+
+    def expired(self, model, count):
+        return self.tokens(
+            model, count, expires_at=timezone.now() - timedelta(minutes=1)
+        )
+
+    def test_deletes_used_and_expired_tokens(self):
+        for model in (EmailVerificationToken, PasswordResetToken):
+            with self.subTest(model=model.__name__):
+                [live] = self.tokens(model, 1)
+                self.tokens(model, 1, is_used=True)
+                self.expired(model, 1)
+
+                self.purge()
+                self.assertEqual(
+                    list(model.objects.values_list("pk", flat=True)), [live]
+                )
+
+    def test_deletes_stale_unverified_users(self):
+        stale = User.objects.create_user(email="stale@example.com", name="Stale")
+        fresh = User.objects.create_user(email="fresh@example.com", name="Fresh")
+        long_ago = timezone.now() - timedelta(hours=25)
+        User.objects.filter(pk__in=[stale.pk, self.user.pk]).update(
+            created_at=long_ago
+        )
+        EmailVerificationToken.objects.create(user=stale)
+
+        self.assertIn("Deleted 1 unverified users", self.purge())
+        self.assertCountEqual(
+            User.objects.values_list("pk", flat=True), [self.user.pk, fresh.pk]
+        )
+        self.assertFalse(EmailVerificationToken.objects.exists())
+
+    def test_deletes_in_keyset_chunks(self):
+        self.expired(EmailVerificationToken, 5)
+
+        with CaptureQueriesContext(connections["default"]) as queries:
+            output = self.purge("--chunk-size", "2")
+
+        deletes = [
+            query["sql"]
+            for query in queries
+            if query["sql"].startswith('DELETE FROM "frontend_emailverificationtoken"')
+        ]
+        self.assertEqual(len(deletes), 3)
+        self.assertIn("Deleted 5 email verification tokens", output)
+        self.assertFalse(EmailVerificationToken.objects.exists())
+
+    def test_dry_run_only_counts(self):
+        self.expired(PasswordResetToken, 2)
+
+        output = self.purge("--dry-run")
+        self.assertIn("Would delete 2 password reset tokens", output)
+        self.assertEqual(PasswordResetToken.objects.count(), 2)
+
+    def test_max_rate_sleeps_between_chunks(self):
+        self.expired(EmailVerificationToken, 3)
+
+        with mock.patch(
+            "frontend.management.commands.purge_auth_data.time"
+        ) as fake_time:
+            fake_time.monotonic.return_value = 0
+            self.purge("--chunk-size", "2", "--max-rate", "1")
+
+        # 2 then 3 rows deleted at t=0, so it waits until t=2 and then t=3
+        self.assertEqual(fake_time.sleep.call_args_list, [mock.call(2), mock.call(3)])
+        self.assertFalse(EmailVerificationToken.objects.exists())
+
+
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    """The "replica" alias mirrors the primary's test database"""
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        unpin()
+        self.addCleanup(unpin)
+        self.user = User.objects.create_user(email="ann@example.com", name="Ann")
+        unpin()  # create_user() wrote outside a request
+
+    def capture(self):
+        return (
+            CaptureQueriesContext(connections["default"]),
+            CaptureQueriesContext(connections["replica"]),
+        )
+
+    def test_reads_go_to_a_replica(self):
+        primary, replica = self.capture()
+        with primary, replica:
+            self.assertTrue(User.objects.filter(pk=self.user.pk).exists())
+        self.assertEqual((len(primary), len(replica)), (0, 1))
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        primary, replica = self.capture()
+
+        def view(request):
+            with replica:
+                User.objects.get(pk=self.user.pk)
+            with primary:
+                User.objects.filter(pk=self.user.pk).update(name="Ann B")
+                self.assertEqual(User.objects.get(pk=self.user.pk).name, "Ann B")
+            return HttpResponse()
+
+        PrimaryPinningMiddleware(view)(RequestFactory().get("/"))
+        self.assertEqual((len(primary), len(replica)), (2, 1))
+
+        # The next request starts on the replica again
+        replica = CaptureQueriesContext(connections["replica"])
+        with replica:
+            PrimaryPinningMiddleware(
+                lambda request: HttpResponse(User.objects.count())
+            )(RequestFactory().get("/"))
+        self.assertEqual(len(replica), 1)
+
+    def test_sessions_use_the_primary(self):
+        session = SessionStore()
+        session["step"] = "login"
+        session.save()
+        unpin()
+
+        primary, replica = self.capture()
+        with primary, replica:
+            self.assertEqual(SessionStore(session.session_key)["step"], "login")
+        self.assertEqual((len(primary), len(replica)), (1, 0))
+
+    def test_replica_is_never_migrated(self):
+        router = PrimaryReplicaRouter()
+        self.assertTrue(router.allow_migrate("default", "frontend"))
+        self.assertFalse(router.allow_migrate("replica", "frontend"))
+        self.assertFalse(router.allow_migrate("replica", "sessions"))
+
+
+@override_settings(**FAST_AUTH)
+class HybridSessionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="ann@example.com", name="Ann", password="s3cret-pass"
+        )
+
+    def test_anonymous_session_stays_in_cookie(self):
+        session = HybridSessionStore()
+        session["step"] = "signup"
+        with self.assertNumQueries(0):
+            session.save()
+        self.assertTrue(is_signed_key(session.session_key))
+
+        with self.assertNumQueries(0):
+            restored = HybridSessionStore(session.session_key)
+            self.assertEqual(restored["step"], "signup")
+
+    def test_login_moves_session_to_database(self):
+        request = RequestFactory().post("/auth/")
+        request.session = HybridSessionStore()
+        request.session["step"] = "login"
+        request.session.save()
+
+        login(request, self.user, backend="frontend.backends.EmailBackend")
+        request.session.save()
+        key = request.session.session_key
+        self.assertFalse(is_signed_key(key))
+        self.assertTrue(Session.objects.filter(session_key=key).exists())
+
+        with self.assertNumQueries(1):
+            restored = HybridSessionStore(key)
+            self.assertEqual(restored["step"], "login")
+            self.assertEqual(restored[SESSION_KEY], str(self.user.pk))
+
+    def test_logout_ends_session_for_every_worker(self):
+        session = HybridSessionStore()
+        session[SESSION_KEY] = str(self.user.pk)
+        session.save()
+        key = session.session_key
+        # Another worker reads the session before this one logs out
+        self.assertEqual(HybridSessionStore(key)[SESSION_KEY], str(self.user.pk))
+
+        HybridSessionStore(key).flush()
+        self.assertNotIn(SESSION_KEY, HybridSessionStore(key))
+
+
+class PictureTagTests(SimpleTestCase):
+    def render(self, name):
+        return Template(
+            "{% load frontend_images %}"
+            f"{{% picture '{name}' alt='x' sizes='200px' class='pic' %}}"
+        ).render(Context())
+
+    def test_variants_rendered_as_srcset(self):
+        html = self.render("frontend/images/phone_mockup.png")
+        self.assertIn('<source type="image/webp"', html)
+        self.assertIn("variants/phone_mockup-480.webp 480w", html)
+        self.assertIn("variants/phone_mockup-480.png 480w", html)
+        self.assertIn('sizes="200px" alt="x" class="pic"', html)
+
+    def test_image_without_smaller_webp_gets_img_srcset(self):
+        # Flat artwork that compresses better as a palette PNG than as WebP
+        entry = {
+            "fallback": "png",
+            "variants": [
+                {
+                    "path": f"frontend/images/variants/flat-{width}.png",
+                    "format": "png",
+                    "width": width,
+                }
+                for width in (240, 480)
+            ],
+        }
+        with mock.patch(
+            "frontend.templatetags.frontend_images.get_variants", return_value=entry
+        ):
+            html = self.render("frontend/images/flat.png")
+        self.assertTrue(html.startswith("<img "))
+        self.assertNotIn("webp", html)
+        self.assertIn("variants/flat-480.png 480w", html)
+
+    def test_image_without_variants_falls_back_to_img(self):
+        self.assertEqual(
+            self.render("frontend/images/hide.png"),
+            '<img src="/static/frontend/images/hide.png" alt="x" class="pic">',
+        )
+
+    def test_template_static_references_resolve(self):
+        self.assertEqual(check_static_references(None), [])
+
+
+class CriticalCSSTests(SimpleTestCase):
+    def test_split_keeps_rules_the_page_uses(self):
+        css = """
+            .card { color: red; animation: pop 1s; }
+            .card:hover { color: blue; }
+            .unused { color: green; }
+            @keyframes pop { from { opacity: 0; } }
+            @keyframes spin { to { transform: rotate(1turn); } }
+            @media (min-width: 600px) {
+                main .card { margin: 0; }
+                .unused { margin: 0; }
+            }
+        """
+        page = index_page('<main><div class="card"></div></main>')
+        critical, deferred = split(parse(css), page)
+
+        self.assertEqual(
+            render(critical),
+            ".card{color:red;animation:pop 1s}"
+            "@media (min-width: 600px){main .card{margin:0}}"
+            "@keyframes pop{from{opacity:0;}}",
+        )
+        self.assertEqual(
+            render(deferred),
+            ".card:hover{color:blue}.unused{color:green}"
+            "@media (min-width: 600px){.unused{margin:0}}"
+            "@keyframes spin{to{transform:rotate(1turn);}}",
+        )
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_auth_page_self_hosts_fonts(self):
+        html = render_to_string(
+            "frontend/auth.html",
+            {"signup_form": SignUpForm(), "login_form": LoginForm()},
+        )
+        self.assertNotIn("fonts.googleapis.com", html)
+        self.assertIn("font-display:swap", html)
+        self.assertIn('url("/static/frontend/fonts/montserrat-400-latin.woff2")', html)
+
+    def test_descendants_of_hidden_elements_are_deferred(self):
+        css = ".hidden{display:none}.panel{color:red}.field{color:blue}.tail{margin:0}"
+        page = index_page(
+            '<div class="panel hidden"><input class="field"><br/>'
+            '<p class="field">x</p></div><p class="tail"></p>',
+            hidden_class="hidden",
+        )
+        critical, deferred = split(parse(css), page)
+
+        self.assertEqual(
+            render(critical), ".hidden{display:none}.panel{color:red}.tail{margin:0}"
+        )
+        self.assertEqual(render(deferred), ".field{color:blue}")
+
+
+class MinifyJSTests(SimpleTestCase):
+    def test_minify_keeps_literals_and_line_breaks(self):
+        source = (
+            "// setup\n"
+            "const url = 'http://x/*y*/';  /* block */\n"
+            "\n"
+            "    let n = a - -b / 2;\n"
+            "const re = /\\/ +/g, t = `a  ${n}  b`\n"
+        )
+        self.assertEqual(
+            minify(source),
+            "const url='http://x/*y*/';\n"
+            "let n=a - -b / 2;\n"
+            "const re=/\\/ +/g,t=`a  ${n}  b`\n",
+        )
@@ -1,10 +1,18 @@
+from django.conf import settings
 from django.urls import path
 from frontend import views
 
 app_name = "frontend"
 
+# Serve the async views when running under an ASGI server (e.g. uvicorn)
+if getattr(settings, "ASYNC_AUTH_VIEWS", False):
+    auth_view = views.aauth_view
+else:
+    auth_view = views.auth_view
+
 urlpatterns = [
-    path('auth/', views.auth_view, name='auth'),
+    path('auth/', auth_view, name='auth'),
+    path('metrics/', views.metrics_view, name='metrics'),
     # add path for password reset if used in template
     # path('password-reset/', views.password_reset_view, name='password_reset'),
 ]
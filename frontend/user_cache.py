@@ -0,0 +1,72 @@
+from contextvars import ContextVar
+
+from django.contrib.auth import get_user_model
+from django.db.models.functions import Lower
+
+User = get_user_model()
+
+# Per-request memo, installed by UserLookupMemoMiddleware; None outside requests.
+# Users are deliberately not cached across requests: login decisions and
+# password checks must see other workers' writes (verification, password
+# resets, purges) immediately, and password hashes don't belong in a cache.
+_memo = ContextVar("user_lookup_memo", default=None)
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def _query(email):
+    return User.objects.alias(email_lower=Lower("email")).filter(email_lower=email)
+
+
+def lookup_user_by_email(email):
+    """
+    Return the user with this email (case-insensitive), or None.
+
+    Results, including misses, are memoized for the current request, so form
+    validation and the service that follows share one query. Saving or
+    deleting a user drops its entry; code that changes a user with
+    QuerySet.update() must call invalidate_user() itself.
+    """
+    email = normalize_email(email)
+    memo = _memo.get()
+    if memo is not None and email in memo:
+        return memo[email]
+
+    user = _query(email).first()
+    if memo is not None:
+        memo[email] = user
+    return user
+
+
+async def alookup_user_by_email(email):
+    """Async version of lookup_user_by_email"""
+    email = normalize_email(email)
+    memo = _memo.get()
+    if memo is not None and email in memo:
+        return memo[email]
+
+    user = await _query(email).afirst()
+    if memo is not None:
+        memo[email] = user
+    return user
+
+
+def invalidate_user(email):
+    memo = _memo.get()
+    if memo is not None:
+        memo.pop(normalize_email(email), None)
+
+
+def invalidate_user_on_change(sender, instance, **kwargs):
+    """post_save/post_delete receiver for the user model"""
+    invalidate_user(instance.email)
+
+
+def start_request_memo():
+    return _memo.set({})
+
+
+def end_request_memo(token):
+    _memo.reset(token)
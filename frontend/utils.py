@@ -1,113 +1,130 @@
 import logging
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.sites.shortcuts import get_current_site
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
+from django.core.cache import caches
 from django.urls import reverse
-from django.utils.html import strip_tags
 
+from .mail_render import render_email
 from .models import EmailVerificationToken, PasswordResetToken
+from .outbox import dispatch_email
+from .tokens import email_verification_token, password_reset_token
 
 logger = logging.getLogger(__name__)
 
 
+def _cooldown_key(kind, user):
+    return f"frontend:email-cooldown:{kind}:{user.pk}"
+
+
+def _claim_send(kind, user):
+    """
+    Start the EMAIL_SEND_COOLDOWN window for this kind of email to user.
+
+    Returns False if one was already sent inside the window. Its token is
+    still valid, so the caller skips the token churn and the send and reports
+    success. cache.add() is atomic, so a double-click sends only once.
+    """
+    cooldown = getattr(settings, "EMAIL_SEND_COOLDOWN", 60)
+    if not cooldown:
+        return True
+    cache = caches[getattr(settings, "EMAIL_COOLDOWN_CACHE_ALIAS", "default")]
+    return cache.add(_cooldown_key(kind, user), True, cooldown)
+
+
+def _release_send(kind, user):
+    # A failed send must not block the user's retry
+    cache = caches[getattr(settings, "EMAIL_COOLDOWN_CACHE_ALIAS", "default")]
+    cache.delete(_cooldown_key(kind, user))
+
+
 def send_verification_email(request, user):
     """Send email verification link to user"""
-    try:
-        # Delete any existing unused tokens for this user
-        EmailVerificationToken.objects.filter(user=user, is_used=False).delete()
+    if not _claim_send("verification", user):
+        logger.info(f"Verification email to {user.email} sent recently, not resent")
+        return True
 
-        # Create new verification token
-        token = EmailVerificationToken.objects.create(user=user)
+    try:
+        if getattr(settings, "STATELESS_EMAIL_VERIFICATION_TOKENS", False):
+            # Signed token, nothing to store
+            token = email_verification_token.make_token(user)
+        else:
+            # Delete any existing unused tokens for this user
+            EmailVerificationToken.objects.filter(user=user, is_used=False).delete()
 
-        # Get current site
-        current_site = get_current_site(request)
+            # Create new verification token
+            token = EmailVerificationToken.objects.create(user=user).token
 
         # Build verification URL
         verification_url = request.build_absolute_uri(
-            reverse("accounts:verify_email", kwargs={"token": str(token.token)})
+            reverse("accounts:verify_email", kwargs={"token": str(token)})
         )
 
-        # Email context
-        context = {
-            "user": user,
-            "verification_url": verification_url,
-            "site_name": current_site.name,
-            "domain": current_site.domain,
-        }
-
-        # Render email template
-        html_message = render_to_string(
-            "accounts/emails/verification_email.html", context
+        # Render email from the cached per-site templates
+        current_site, plain_message, html_message = render_email(
+            "accounts/emails/verification_email",
+            request,
+            user,
+            verification_url=verification_url,
         )
-        plain_message = strip_tags(html_message)
 
-        # Send email
-        send_mail(
+        # Send email (queued in the outbox unless it is disabled)
+        dispatch_email(
             subject=f"Verify your email for {current_site.name}",
             message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
+            recipient=user.email,
             html_message=html_message,
-            fail_silently=False,
         )
 
         logger.info(f"Verification email sent to {user.email}")
         return True
 
     except Exception as e:
+        _release_send("verification", user)
         logger.error(f"Failed to send verification email to {user.email}: {str(e)}")
         return False
 
 
 def send_password_reset_email(request, user):
     """Send password reset link to user"""
-    try:
-        # Delete any existing unused tokens for this user
-        PasswordResetToken.objects.filter(user=user, is_used=False).delete()
+    if not _claim_send("password_reset", user):
+        logger.info(f"Password reset email to {user.email} sent recently, not resent")
+        return True
 
-        # Create new reset token
-        token = PasswordResetToken.objects.create(user=user)
+    try:
+        if getattr(settings, "STATELESS_PASSWORD_RESET_TOKENS", False):
+            # Signed token, nothing to store
+            token = password_reset_token.make_token(user)
+        else:
+            # Delete any existing unused tokens for this user
+            PasswordResetToken.objects.filter(user=user, is_used=False).delete()
 
-        # Get current site
-        current_site = get_current_site(request)
+            # Create new reset token
+            token = PasswordResetToken.objects.create(user=user).token
 
         # Build reset URL
         reset_url = request.build_absolute_uri(
-            reverse(
-                "accounts:password_reset_confirm", kwargs={"token": str(token.token)}
-            )
+            reverse("accounts:password_reset_confirm", kwargs={"token": str(token)})
         )
 
-        # Email context
-        context = {
-            "user": user,
-            "reset_url": reset_url,
-            "site_name": current_site.name,
-            "domain": current_site.domain,
-        }
-
-        # Render email template
-        html_message = render_to_string(
-            "accounts/emails/password_reset_email.html", context
+        # Render email from the cached per-site templates
+        current_site, plain_message, html_message = render_email(
+            "accounts/emails/password_reset_email", request, user, reset_url=reset_url
         )
-        plain_message = strip_tags(html_message)
 
-        # Send email
-        send_mail(
+        # Send email (queued in the outbox unless it is disabled)
+        dispatch_email(
             subject=f"Reset your password for {current_site.name}",
             message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
+            recipient=user.email,
             html_message=html_message,
-            fail_silently=False,
         )
 
         logger.info(f"Password reset email sent to {user.email}")
         return True
 
     except Exception as e:
+        _release_send("password_reset", user)
         logger.error(f"Failed to send password reset email to {user.email}: {str(e)}")
         return False
 
@@ -115,29 +132,20 @@ def send_password_reset_email(request, user):
 def send_welcome_email(request, user):
     """Send welcome email to newly verified user"""
     try:
-        # Get current site
-        current_site = get_current_site(request)
-
-        # Email context
-        context = {
-            "user": user,
-            "site_name": current_site.name,
-            "domain": current_site.domain,
-            "login_url": request.build_absolute_uri(reverse("accounts:auth")),
-        }
-
-        # Render email template
-        html_message = render_to_string("accounts/emails/welcome_email.html", context)
-        plain_message = strip_tags(html_message)
-
-        # Send email
-        send_mail(
+        # Render email from the cached per-site templates
+        current_site, plain_message, html_message = render_email(
+            "accounts/emails/welcome_email",
+            request,
+            user,
+            login_url=request.build_absolute_uri(reverse("accounts:auth")),
+        )
+
+        # Send email (queued in the outbox unless it is disabled)
+        dispatch_email(
             subject=f"Welcome to {current_site.name}!",
             message=plain_message,
-            from_email=settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[user.email],
+            recipient=user.email,
             html_message=html_message,
-            fail_silently=False,
         )
 
         logger.info(f"Welcome email sent to {user.email}")
@@ -146,3 +154,10 @@ def send_welcome_email(request, user):
     except Exception as e:
         logger.error(f"Failed to send welcome email to {user.email}: {str(e)}")
         return False
+
+
+# Async wrappers for the async views; token writes and the outbox insert run
+# through sync_to_async
+asend_verification_email = sync_to_async(send_verification_email)
+asend_password_reset_email = sync_to_async(send_password_reset_email)
+asend_welcome_email = sync_to_async(send_welcome_email)
@@ -4,20 +4,32 @@
 # def auth_view(request):
 #     return render(request, "frontend/auth.html")
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
-from django.contrib.auth import login, update_session_auth_hash
+from django.contrib.auth import alogin, login, update_session_auth_hash
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import PasswordChangeForm
+from django.http import Http404, HttpResponse
 from django.shortcuts import redirect, render
 from django.urls import reverse
 
+from frontend import metrics
+from frontend.decorators import cache_anonymous_page, rate_limit
 from frontend.forms import (LoginForm, PasswordResetConfirmForm,
                             PasswordResetRequestForm, ProfileUpdateForm,
                             ResendVerificationForm, SignUpForm)
-from frontend.services import (confirm_password_reset, handle_login,
+from frontend.services import (aconfirm_password_reset, ahandle_login,
+                               ahandle_signup, arequest_password_reset,
+                               aresend_verification, averify_email_token,
+                               confirm_password_reset, handle_login,
                                handle_signup, request_password_reset,
                                resend_verification, verify_email_token)
-from frontend.utils import send_welcome_email
+from frontend.utils import asend_welcome_email, send_welcome_email
+
+
+def _auth_scope(request):
+    return "signup" if "signup_form" in request.POST else "login"
 
 
 @login_required
@@ -25,12 +37,14 @@ def dashboard_view(request):
     return render(request, "frontend/dashboard.html", {"user": request.user})
 
 
+@cache_anonymous_page
+@rate_limit(_auth_scope)
 def auth_view(request):
     if request.user.is_authenticated:
         return redirect("home")
 
-    signup_form = SignUpForm()
-    login_form = LoginForm()
+    # Only the form that was posted is bound; the other is built at render time
+    signup_form = login_form = None
     show_login = False
 
     if request.method == "POST":
@@ -80,8 +94,8 @@ def auth_view(request):
         request,
         "frontend/auth.html",
         {
-            "signup_form": signup_form,
-            "login_form": login_form,
+            "signup_form": signup_form or SignUpForm(),
+            "login_form": login_form or LoginForm(),
             "show_login": show_login,
         },
     )
@@ -104,10 +118,12 @@ def verify_email_view(request, token):
     return redirect("frontend:auth")
 
 
+@cache_anonymous_page
 def verification_sent_view(request):
     return render(request, "frontend/emails/verification_sent.html")
 
 
+@rate_limit("resend_verification")
 def resend_verification_view(request):
     if request.user.is_authenticated:
         return redirect("home")
@@ -115,7 +131,7 @@ def resend_verification_view(request):
     if request.method == "POST":
         form = ResendVerificationForm(request.POST)
         if form.is_valid():
-            if resend_verification(request, form.cleaned_data["email"]):
+            if resend_verification(request, form):
                 messages.success(
                     request, "Verification email sent. Please check your inbox."
                 )
@@ -126,6 +142,7 @@ def resend_verification_view(request):
     return render(request, "frontend/emails/resend_verification.html", {"form": form})
 
 
+@rate_limit("password_reset")
 def password_reset_request_view(request):
     if request.user.is_authenticated:
         return redirect("home")
@@ -133,7 +150,7 @@ def password_reset_request_view(request):
     if request.method == "POST":
         form = PasswordResetRequestForm(request.POST)
         if form.is_valid():
-            user, status = request_password_reset(request, form.cleaned_data["email"])
+            user, status = request_password_reset(request, form)
             if status == "unverified":
                 messages.error(request, "Please verify your email address first.")
                 return redirect("frontend:resend_verification")
@@ -156,6 +173,7 @@ def password_reset_request_view(request):
     )
 
 
+@cache_anonymous_page
 def password_reset_sent_view(request):
     return render(request, "frontend/emails/password_reset_sent.html")
 
@@ -226,3 +244,196 @@ def profile_view(request):
             "password_form": password_form,
         },
     )
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint, for the addresses in METRICS_ALLOWED_IPS"""
+    enabled = getattr(settings, "INSTRUMENTATION_ENABLED", False)
+    allowed = getattr(settings, "METRICS_ALLOWED_IPS", [])
+    # The socket peer only: forwarded headers are client-controlled without a proxy
+    if not enabled or request.META.get("REMOTE_ADDR") not in allowed:
+        raise Http404()
+    return HttpResponse(
+        metrics.registry.render(), content_type="text/plain; version=0.0.4"
+    )
+
+
+# ---------------- ASYNC (ASGI) ----------------
+# Async counterparts of the auth views, routed when ASYNC_AUTH_VIEWS is set.
+# Forms that query the database in clean_*() are validated via sync_to_async.
+
+
+async def _arender(request, template_name, context=None):
+    # Template rendering may read messages from the session, which must not
+    # hit the database synchronously, so load the session up front
+    await request.session.aitems()
+    return render(request, template_name, context)
+
+
+@cache_anonymous_page
+@rate_limit(_auth_scope)
+async def aauth_view(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return redirect("home")
+
+    # Only the form that was posted is bound; the other is built at render time
+    signup_form = login_form = None
+    show_login = False
+
+    if request.method == "POST":
+        if "signup_form" in request.POST:
+            signup_form = SignUpForm(request.POST)
+            if await sync_to_async(signup_form.is_valid)():
+                result = await ahandle_signup(request, signup_form)
+                if result == "resend":
+                    messages.info(
+                        request, "Verification email resent. Please check your inbox."
+                    )
+                    return redirect("frontend:verification_sent")
+                elif result == "exists":
+                    messages.error(request, "Email already registered.")
+                elif result == "success":
+                    return redirect("frontend:verification_sent")
+                else:
+                    messages.error(
+                        request,
+                        "Account created but email failed to send. Contact support.",
+                    )
+
+        elif "login_form" in request.POST:
+            login_form = LoginForm(request.POST)
+            show_login = True
+            if login_form.is_valid():
+                user, status = await ahandle_login(request, login_form)
+                if status == "success":
+                    await alogin(request, user)
+                    messages.success(request, f"Successfully signed in as {user.name}")  # type: ignore
+                    return redirect("home")
+                elif status == "unverified":
+                    messages.error(
+                        request,
+                        "Please verify your email first. "
+                        f"<a href='{reverse('frontend:resend_verification')}'>Resend</a>",
+                    )
+                elif status == "inactive":
+                    messages.error(
+                        request,
+                        "Your account has been deactivated. Please contact support.",
+                    )
+                else:
+                    messages.error(request, "Invalid email or password.")
+
+    return await _arender(
+        request,
+        "frontend/auth.html",
+        {
+            "signup_form": signup_form or SignUpForm(),
+            "login_form": login_form or LoginForm(),
+            "show_login": show_login,
+        },
+    )
+
+
+async def averify_email_view(request, token):
+    user, status = await averify_email_token(token)
+    if status == "expired":
+        messages.error(request, "Verification link expired. Request a new one.")
+        return redirect("frontend:resend_verification")
+    elif status == "used":
+        messages.error(request, "This verification link has already been used.")
+        return redirect("frontend:auth")
+    elif status == "success":
+        await asend_welcome_email(request, user)
+        messages.success(request, "Your email has been verified! You can now log in.")
+        return redirect("frontend:auth")
+
+    messages.error(request, "Invalid verification link.")
+    return redirect("frontend:auth")
+
+
+@rate_limit("resend_verification")
+async def aresend_verification_view(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return redirect("home")
+
+    if request.method == "POST":
+        form = ResendVerificationForm(request.POST)
+        if await sync_to_async(form.is_valid)():
+            if await aresend_verification(request, form):
+                messages.success(
+                    request, "Verification email sent. Please check your inbox."
+                )
+                return redirect("frontend:verification_sent")
+            messages.error(request, "Failed to send verification email.")
+    else:
+        form = ResendVerificationForm()
+    return await _arender(
+        request, "frontend/emails/resend_verification.html", {"form": form}
+    )
+
+
+@rate_limit("password_reset")
+async def apassword_reset_request_view(request):
+    user = await request.auser()
+    if user.is_authenticated:
+        return redirect("home")
+
+    if request.method == "POST":
+        form = PasswordResetRequestForm(request.POST)
+        if await sync_to_async(form.is_valid)():
+            user, status = await arequest_password_reset(request, form)
+            if status == "unverified":
+                messages.error(request, "Please verify your email address first.")
+                return redirect("frontend:resend_verification")
+            elif status == "success":
+                messages.success(
+                    request, "Password reset instructions sent to your email."
+                )
+                return redirect("frontend:password_reset_sent")
+            elif status == "fail":
+                messages.error(
+                    request, "Failed to send password reset email. Try again later."
+                )
+            else:
+                messages.error(request, "Invalid email address.")
+    else:
+        form = PasswordResetRequestForm()
+
+    return await _arender(
+        request, "frontend/emails/password_reset_request.html", {"form": form}
+    )
+
+
+async def apassword_reset_confirm_view(request, token):
+    if request.method == "POST":
+        form = PasswordResetConfirmForm(request.POST)
+        if form.is_valid():
+            user, status = await aconfirm_password_reset(
+                token, form.cleaned_data["password1"]
+            )
+            if status == "success":
+                messages.success(
+                    request, "Your password has been reset. You can log in now."
+                )
+                return redirect("frontend:auth")
+            elif status == "expired":
+                messages.error(request, "Password reset link expired.")
+                return redirect("frontend:password_reset")
+            elif status == "used":
+                messages.error(
+                    request, "This password reset link has already been used."
+                )
+                return redirect("frontend:password_reset")
+            else:
+                messages.error(request, "Invalid password reset link.")
+                return redirect("frontend:password_reset")
+    else:
+        form = PasswordResetConfirmForm()
+
+    return await _arender(
+        request,
+        "frontend/emails/password_reset_confirm.html",
+        {"form": form, "token": token},
+    )
@@ -43,6 +43,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'frontend.middleware.InstrumentationMiddleware',
+    'frontend.middleware.PrimaryPinningMiddleware',
+    'frontend.middleware.UserLookupMemoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     "whitenoise.middleware.WhiteNoiseMiddleware",  # add this line
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -51,15 +54,20 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'frontend.middleware.HashingBackpressureMiddleware',
 ]
 
 ROOT_URLCONF = 'mobzilla_frontend.urls'
 
+_TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [BASE_DIR / 'frontend' / 'templates'],
-        'APP_DIRS': True,
         'OPTIONS': {
             'context_processors': [
                 'django.template.context_processors.debug',
@@ -67,12 +75,28 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
             ],
+            # Compile each template once per process outside development
+            'loaders': _TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', _TEMPLATE_LOADERS),
+            ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'mobzilla_frontend.wsgi.application'
 
+# Per-request timing (frontend.middleware.InstrumentationMiddleware): adds a
+# Server-Timing header, serves Prometheus metrics at /metrics/ to
+# METRICS_ALLOWED_IPS and logs requests slower than the threshold with their
+# queries. Off by default; the middleware removes itself when disabled.
+# METRICS_ALLOWED_IPS is matched against REMOTE_ADDR, never X-Forwarded-For.
+INSTRUMENTATION_ENABLED = False
+INSTRUMENTATION_SLOW_REQUEST_MS = 500
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Route the async auth views; enable only when serving through asgi.py
+ASYNC_AUTH_VIEWS = False
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -81,14 +105,97 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections open across requests, checking them before reuse
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock at BEGIN so concurrent writers queue on
+            # busy_timeout instead of failing with "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Per-process cache; point this at Redis/Memcached to share it between workers
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+
+# frontend.decorators.cache_anonymous_page keeps rendered auth pages here
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 300  # seconds
+
+# Anonymous sessions live in a signed cookie; logging in moves the session to
+# the database. With a cache every worker shares (Redis/Memcached), use
+# 'frontend.cached_sessions' and point SESSION_CACHE_ALIAS at it to skip the
+# session query; a per-process cache would keep serving logged-out sessions.
+# Expired rows are removed by `manage.py purge_auth_data`.
+SESSION_ENGINE = 'frontend.sessions'
+
+# Limits on auth POSTs (frontend.ratelimit): "N/period" allows N requests per
+# fixed window of that period. Over-limit requests get a 429 before any hashing
+# or email work. Point RATE_LIMIT_CACHE_ALIAS at a shared cache so all workers
+# count together.
+RATE_LIMITS = {
+    'login': {'ip': '30/m', 'email': '10/15m'},
+    'signup': {'ip': '10/h', 'email': '3/h'},
+    'resend_verification': {'ip': '10/h', 'email': '3/h'},
+    'password_reset': {'ip': '10/h', 'email': '3/h'},
+}
+RATE_LIMIT_CACHE_ALIAS = 'default'
+# On Render REMOTE_ADDR is the proxy, so the client is read from the last
+# X-Forwarded-For hop, which Render appends (earlier hops can be forged).
+# Requests without the header fall back to REMOTE_ADDR. Set to None when
+# serving without a proxy, or clients can pick their own IP.
+RATE_LIMIT_CLIENT_IP_HEADER = 'HTTP_X_FORWARDED_FOR'
+
+# Read replicas: aliases in DATABASE_REPLICAS get pure reads until a request
+# writes, after which it stays on "default". "replica" is a stand-in that opens
+# the primary's file (and mirrors the primary in tests); point its NAME at a
+# real replica and list it in DATABASE_REPLICAS to route reads to it.
+DATABASES['replica'] = {**DATABASES['default'], 'TEST': {'MIRROR': 'default'}}
+DATABASE_ROUTERS = ['frontend.routers.PrimaryReplicaRouter']
+DATABASE_REPLICAS = []
+
+# Applied to each new SQLite connection by frontend.db.configure_sqlite.
+# WAL lets readers run alongside the single writer; set to {} to disable.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,  # ms
+    'mmap_size': 134217728,  # 128 MiB
+    'cache_size': -20000,  # negative = KiB, so ~20 MiB
+    'temp_store': 'MEMORY',
+}
+
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "frontend" / "static"]
 # STATIC_ROOT only needed for collectstatic (production)
 STATIC_ROOT = BASE_DIR / "staticfiles"
 
+# Outside DEBUG, collectstatic writes content-hashed copies plus .gz/.br variants
+# (brotli needs whitenoise[brotli]), and WhiteNoise serves the hashed names
+# with a far-future "immutable" Cache-Control. Run collectstatic on deploy.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': (
+            'django.contrib.staticfiles.storage.StaticFilesStorage'
+            if DEBUG
+            else 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+        ),
+    },
+}
+# Cache lifetime (seconds) of static files without a hash in their name
+WHITENOISE_MAX_AGE = 0 if DEBUG else 3600
+
+# Widths (px) written by `manage.py optimize_images` for the {% picture %} tag
+IMAGE_VARIANT_WIDTHS = [240, 480, 720, 1080]
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -106,6 +213,19 @@ AUTH_PASSWORD_VALIDATORS = [
         'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
     },
 ]
+# Login reuses the user row already loaded by the service layer
+AUTHENTICATION_BACKENDS = ["frontend.backends.EmailBackend"]
+
+# Issue HMAC-signed links instead of storing token rows. Redemption accepts both
+# kinds, so links sent before switching keep working.
+STATELESS_EMAIL_VERIFICATION_TOKENS = False
+STATELESS_PASSWORD_RESET_TOKENS = False
+
+# Password hashing runs on a process pool so PBKDF2 doesn't hold request workers.
+# Once MAX_PENDING hashes are queued, further requests get a 503.
+# Set PASSWORD_HASHING_WORKERS = 0 to hash inline on the request thread.
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_MAX_PENDING = 32
 
 
 # Internationalization
@@ -130,3 +250,18 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = "frontend.User"
+
+# Outgoing email
+# Emails are written to the OutboundEmail table and delivered by
+# `manage.py send_queued_emails`. Set EMAIL_OUTBOX_ENABLED = False to send inline.
+EMAIL_OUTBOX_ENABLED = True
+EMAIL_OUTBOX_WORKERS = 4
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_BACKOFF = 30  # seconds, doubled on each retry
+# SMTP connections are pooled and reused; idle ones are closed after the timeout
+EMAIL_POOL_SIZE = 4
+EMAIL_POOL_IDLE_TIMEOUT = 60  # seconds
+# Repeat verification/reset emails to a user inside this window are skipped;
+# the link already sent stays valid. Set to 0 to always send.
+EMAIL_SEND_COOLDOWN = 60  # seconds
+EMAIL_COOLDOWN_CACHE_ALIAS = 'default'